@@ -3,13 +3,18 @@
 build_exe.py – Build a self-contained Windows .exe for the LROI PROMs Converter.
 
 Run this script on a Windows machine (or Wine/cross-compile environment):
-    python build_exe.py
+    python build_exe.py            # incremental: reuses PyInstaller's build/ cache
+    python build_exe.py --fresh    # wipe build/ and PyInstaller's cache first
+    python build_exe.py --gui      # windowed exe (no console, GUI only)
 
 What it does
 ------------
 1.  Verifies PyInstaller is installed (offers to install it if not).
-2.  Runs PyInstaller to produce a single-file executable:
-        dist/lroi_converter/lroi_converter.exe
+2.  Runs PyInstaller to produce a one-folder build:
+        dist/lroi_converter/lroi_converter.exe   (+ its support files)
+    A one-folder build starts much faster than --onefile, which unpacks the
+    whole bundle to a temp directory on every launch.  Set the environment
+    variable LROI_ONEFILE=1 to build a single-file .exe instead.
 3.  Copies config.toml next to the .exe so hospitals can edit it without
     rebuilding the binary.
 4.  Prints a short summary of what to ship to end-users.
@@ -33,8 +38,11 @@ Use a Windows machine, a Windows VM, or GitHub Actions with windows-latest.
 
 from __future__ import annotations
 
+import argparse
 import importlib.util
+import json
 import os
+import pkgutil
 import platform
 import shutil
 import subprocess
@@ -63,19 +71,25 @@ EXTRA_FILES: dict[Path, str] = {
     PROJECT_DIR / "config.toml": "config.toml",
 }
 
+# One-folder build by default (fast start-up); LROI_ONEFILE=1 → single .exe
+ONEFILE      = os.environ.get("LROI_ONEFILE", "") == "1"
+
 # Optional application icon (.ico file).  Set to None if you have no icon.
 ICON_FILE: Path | None = PROJECT_DIR / "icon.ico"  # ignored if file absent
 
-# Hidden imports that PyInstaller's static analysis sometimes misses
+# Hidden imports that PyInstaller's static analysis sometimes misses.
+# All openpyxl submodules are added automatically (see _openpyxl_submodules).
 HIDDEN_IMPORTS = [
     "openpyxl",
-    "openpyxl.styles.stylesheet",   # often missed
     "lxml",
     "lxml.etree",
     "tkinter",
     "tomllib",                       # stdlib Python 3.11+
 ]
 
+# Cache of openpyxl submodule lists, keyed by openpyxl version
+BUILD_CACHE_FILE = Path.home() / ".cache" / "lroi_converter_build" / "openpyxl.json"
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Helpers
 # ─────────────────────────────────────────────────────────────────────────────
@@ -113,23 +127,63 @@ def _warn_platform() -> None:
         )
 
 
-def _build_pyinstaller_command() -> list[str]:
+def _openpyxl_submodules(openpyxl_module) -> list[str]:
+    """
+    List every openpyxl submodule.
+
+    openpyxl imports some modules dynamically (e.g. openpyxl.styles.stylesheet),
+    which PyInstaller's static analysis misses; listing them all as hidden
+    imports avoids ModuleNotFoundError at hospital sites when openpyxl changes.
+
+    The list is cached in BUILD_CACHE_FILE per openpyxl version and install
+    location, so repeated builds (e.g. CI matrices) skip the package walk.
+    """
+    version  = getattr(openpyxl_module, "__version__", "")
+    data_dir = str(Path(openpyxl_module.__file__).parent)
+
+    try:
+        cache = json.loads(BUILD_CACHE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cache = {}
+
+    entry = cache.get(version)
+    if isinstance(entry, dict) and entry.get("data_dir") == data_dir:
+        return list(entry.get("submodules", []))
+
+    submodules = [
+        m.name
+        for m in pkgutil.walk_packages(openpyxl_module.__path__, prefix="openpyxl.")
+    ]
+
+    cache[version] = {"data_dir": data_dir, "submodules": submodules}
+    try:
+        BUILD_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        BUILD_CACHE_FILE.write_text(json.dumps(cache, indent=2), encoding="utf-8")
+    except OSError:
+        pass  # caching is best-effort
+
+    return submodules
+
+
+def _build_pyinstaller_command(fresh: bool = False, gui: bool = False) -> list[str]:
     """Assemble the PyInstaller command-line arguments."""
     cmd = [
         sys.executable, "-m", "PyInstaller",
         "--noconfirm",          # overwrite previous build without asking
-        "--clean",              # start fresh (removes cached .pyc etc.)
-        "--onefile",            # single self-contained .exe  ← key flag
-        "--windowed",           # suppress the console window when launched via GUI
-                                # (remove this flag if you want the console visible)
-        "--console",            # BUT keep a console so CLI usage still works.
-                                # NOTE: on Windows --windowed + --console = console
-                                # hidden unless opened from cmd.  If you want the
-                                # CLI to always show a terminal, remove --windowed.
+        "--onefile" if ONEFILE else "--onedir",  # onedir: no unpacking on every launch
+        # This is a console app so CLI usage works; running it from Explorer
+        # opens a terminal window next to the GUI.  --gui builds a windowed
+        # (GUI-only) exe instead, which has no console for CLI output.
+        "--windowed" if gui else "--console",
         f"--name={APP_NAME}",
         f"--distpath={DIST_DIR.parent}",  # PyInstaller puts output in distpath/<name>/
     ]
 
+    # Without --clean PyInstaller reuses its analysis cache in build/,
+    # which makes rebuilds much faster.  --fresh forces a full rebuild.
+    if fresh:
+        cmd.append("--clean")
+
     # ── Hidden imports ────────────────────────────────────────────────────────
     for hi in HIDDEN_IMPORTS:
         cmd += ["--hidden-import", hi]
@@ -146,6 +200,8 @@ def _build_pyinstaller_command() -> list[str]:
         openpyxl_dir = Path(openpyxl.__file__).parent
         # Syntax: "source_path{os.pathsep}dest_folder_inside_bundle"
         cmd += ["--add-data", f"{openpyxl_dir}{os.pathsep}openpyxl"]
+        for name in _openpyxl_submodules(openpyxl):
+            cmd += ["--hidden-import", name]
     except ImportError:
         print("  WARNING: openpyxl not found; .exe may fail at runtime.", file=sys.stderr)
 
@@ -160,7 +216,20 @@ def _build_pyinstaller_command() -> list[str]:
 # ─────────────────────────────────────────────────────────────────────────────
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Build the LROI PROMs Converter .exe")
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="Remove build/ and PyInstaller's cache for a full rebuild.",
+    )
+    parser.add_argument(
+        "--gui",
+        action="store_true",
+        help="Build a windowed (GUI-only) exe without a console window.",
+    )
+    args = parser.parse_args(argv)
+
     _header("LROI PROMs Converter – EXE build")
     _warn_platform()
 
@@ -173,8 +242,12 @@ def main() -> int:
         return 1
 
     # ── Clean previous dist ───────────────────────────────────────────────────
+    # build/ holds PyInstaller's analysis cache; keep it unless --fresh
     _header("Step 2 / 4 – Cleaning previous build artefacts")
-    for d in [PROJECT_DIR / "dist", PROJECT_DIR / "build"]:
+    stale_dirs = [PROJECT_DIR / "dist"]
+    if args.fresh:
+        stale_dirs.append(PROJECT_DIR / "build")
+    for d in stale_dirs:
         if d.exists():
             shutil.rmtree(d)
             print(f"  Removed: {d}")
@@ -187,7 +260,7 @@ def main() -> int:
 
     # ── Run PyInstaller ───────────────────────────────────────────────────────
     _header("Step 3 / 4 – Running PyInstaller")
-    cmd = _build_pyinstaller_command()
+    cmd = _build_pyinstaller_command(fresh=args.fresh, gui=args.gui)
     print("  Command:")
     print("    " + " \\\n      ".join(cmd))
     print()
@@ -207,8 +280,8 @@ def main() -> int:
     exe_suffix = ".exe" if platform.system() == "Windows" else ""
     exe_path   = DIST_DIR / f"{APP_NAME}{exe_suffix}"
 
-    # PyInstaller --onefile puts the exe directly in distpath/<name>/
-    # Confirm it's there
+    # PyInstaller --onedir puts the exe in distpath/<name>/,
+    # --onefile puts it directly in distpath/
     if not exe_path.exists():
         # Try flat distpath (some PyInstaller versions)
         exe_path = DIST_DIR.parent / f"{APP_NAME}{exe_suffix}"
@@ -227,8 +300,13 @@ def main() -> int:
     print(f"  Executable : {exe_path}")
     print(f"  Output dir : {DIST_DIR}")
     print()
-    print("  Ship the following files to end-users:")
-    print(f"    {exe_path.name}   ← the application")
+    if ONEFILE:
+        print("  Ship the following files to end-users:")
+        print(f"    {exe_path.name}   ← the application")
+    else:
+        print(f"  Ship the ENTIRE {DIST_DIR.name}/ folder to end-users (zip it), including:")
+        print(f"    {exe_path.name}   ← the application")
+        print("    _internal/            ← runtime files, keep next to the .exe")
     for dest_name in EXTRA_FILES.values():
         print(f"    {dest_name}         ← edit HOSPITAL number before distributing")
     print()
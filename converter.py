@@ -21,12 +21,19 @@ v1.4.0 Architecture:
 
 from __future__ import annotations
 
+import functools
+import io
 import logging
+import logging.handlers
+import multiprocessing
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, TextIO, Tuple
 from xml.etree import ElementTree as ET
-from xml.dom import minidom
 
 import openpyxl
 
@@ -46,6 +53,26 @@ log = logging.getLogger("lroi")
 # ─────────────────────────────────────────────────────────────────────────────
 
 
+def _is_empty(value: Any) -> bool:
+    """
+    True for None and blank strings.
+    
+    Cell values arrive as native types (int, float, datetime, ...) which are
+    never blank, so only strings need stripping; this avoids a str() copy
+    per check on the hot path.
+    """
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _to_str(value: Any) -> str:
+    """Stripped string form of a cell value ("" for None)."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.strip()
+    return str(value).strip()
+
+
 def _sub(parent: ET.Element, tag: str, text: str) -> Optional[ET.Element]:
     """
     Append a child element with text content.
@@ -53,7 +80,7 @@ def _sub(parent: ET.Element, tag: str, text: str) -> Optional[ET.Element]:
     If text is empty/None, no element is created (reduces XML bloat).
     Returns the created element or None if skipped.
     """
-    if text is None or str(text).strip() == "":
+    if _is_empty(text):
         return None
     el = ET.SubElement(parent, tag)
     el.text = str(text)
@@ -65,6 +92,11 @@ def _sub(parent: ET.Element, tag: str, text: str) -> Optional[ET.Element]:
 # ─────────────────────────────────────────────────────────────────────────────
 
 
+def _header_names(header_row: Tuple[Any, ...]) -> List[str]:
+    """Normalise a sheet's first row into column names ("" for empty cells)."""
+    return [str(h).strip() if h is not None else "" for h in header_row]
+
+
 def load_lut(lut_path: str | Path, join_column: str) -> Dict[str, Dict[str, Any]]:
     """
     Load LUT file into memory, indexed by join column.
@@ -83,29 +115,35 @@ def load_lut(lut_path: str | Path, join_column: str) -> Dict[str, Dict[str, Any]
     """
     log.info("Loading LUT: %s", lut_path)
     
-    wb = openpyxl.load_workbook(lut_path, read_only=True, data_only=True)
+    # keep_links=False: external workbook links are never needed for a LUT
+    wb = openpyxl.load_workbook(lut_path, read_only=True, data_only=True, keep_links=False)
     ws = wb.worksheets[0]
     
-    rows = list(ws.iter_rows(values_only=True))
-    if not rows:
+    # Stream plain value tuples: materialising the sheet would defeat read_only mode
+    row_iter = iter(ws.values)
+    first = next(row_iter, None)
+    if first is None:
         log.warning("LUT file appears to be empty: %s", lut_path)
+        wb.close()
         return {}
     
-    headers = [str(h).strip() if h is not None else "" for h in rows[0]]
+    headers = _header_names(first)
     
     if join_column not in headers:
+        wb.close()
         raise KeyError(
             f"LUT join column '{join_column}' not found in {lut_path}. "
             f"Available columns: {headers}"
         )
     
     join_idx = headers.index(join_column)
+    n_headers = len(headers)
     lut_index = {}
     loaded = 0
     skipped = 0
     
-    for row in rows[1:]:
-        if all(v is None for v in row):
+    for row in row_iter:
+        if row.count(None) == len(row):
             continue  # Blank row
         
         if join_idx >= len(row):
@@ -118,10 +156,9 @@ def load_lut(lut_path: str | Path, join_column: str) -> Dict[str, Dict[str, Any]
             continue
         
         key_str = str(key).strip()
-        lut_index[key_str] = {
-            headers[i]: (row[i] if i < len(row) else None)
-            for i in range(len(headers))
-        }
+        if len(row) < n_headers:
+            row = row + (None,) * (n_headers - len(row))
+        lut_index[key_str] = dict(zip(headers, row))
         loaded += 1
     
     wb.close()
@@ -133,7 +170,8 @@ def merge_lut_data(
     row: Dict[str, Any],
     lut_index: Dict[str, Dict[str, Any]],
     prom_config: Dict[str, Any],
-    lut_column_prefix: str
+    lut_column_prefix: str,
+    inplace: bool = False
 ) -> Dict[str, Any]:
     """
     Merge LUT data into XLS row with prefix.
@@ -146,6 +184,8 @@ def merge_lut_data(
         lut_index: LUT data loaded by load_lut()
         prom_config: [PROM.<key>] config section
         lut_column_prefix: Prefix for LUT columns (e.g., "__LUT__")
+        inplace: Add LUT columns to *row* itself instead of a copy
+                 (for callers that own the row dict and discard it afterwards)
     
     Returns:
         Merged row dict (XLS columns + prefixed LUT columns)
@@ -156,17 +196,72 @@ def merge_lut_data(
         merged = merge_lut_data(row, lut_index, config, "__LUT__")
         # → {"id": "P001", "Q1": 3, "__LUT__Gender": "Male", "__LUT__DOB": "1970-01-01"}
     """
-    lookup_config = prom_config.get("lookup", {})
+    plan = build_lookup_plan(prom_config, lut_column_prefix)
+    return merge_lut_with_plan(row, lut_index, plan, inplace=inplace)
+
+
+@dataclass
+class LookupPlan:
+    """
+    Pre-resolved [PROM.<key>.lookup] settings for merge_lut_with_plan().
     
-    if not lookup_config.get("required"):
-        return row  # LUT not required for this PROM
+    add_columns holds (lut_column, prefixed_column) pairs so the prefix is
+    concatenated once per PROM rather than once per row.
+    """
+    required: bool
+    join_column: Optional[str]
+    add_columns: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def build_lookup_plan(prom_config: Dict[str, Any], lut_column_prefix: str) -> LookupPlan:
+    """
+    Resolve the lookup section of a PROM config into a LookupPlan.
     
-    # Get join column value from XLS row
+    Supports both the add_columns list (simple mode) and the legacy
+    xml_element = lut_column mapping.
+    """
+    lookup_config = prom_config.get("lookup", {})
+    required = bool(lookup_config.get("required"))
     join_column = lookup_config.get("join_column")
-    if not join_column:
+    
+    if required and not join_column:
         log.warning("LUT required but join_column not specified")
-        return row
     
+    add_columns = lookup_config.get("add_columns")
+    if add_columns:
+        # Simple mode: Just add these columns from LUT
+        lut_columns = list(add_columns)
+    else:
+        # Legacy mode: Map XML elements to LUT columns (for backward compatibility)
+        lut_columns = [
+            lut_column for xml_element, lut_column in lookup_config.items()
+            if xml_element not in ["required", "join_column", "add_columns"]
+        ]
+    
+    return LookupPlan(
+        required=required,
+        join_column=join_column,
+        add_columns=[(c, f"{lut_column_prefix}{c}") for c in lut_columns],
+    )
+
+
+def merge_lut_with_plan(
+    row: Dict[str, Any],
+    lut_index: Dict[str, Dict[str, Any]],
+    plan: LookupPlan,
+    inplace: bool = False
+) -> Dict[str, Any]:
+    """
+    Merge LUT data into XLS row using a LookupPlan.
+    
+    Same behaviour as merge_lut_data(), without re-reading the lookup
+    config for every row.
+    """
+    if not plan.required or not plan.join_column:
+        return row  # LUT not required for this PROM (or misconfigured)
+    
+    # Get join column value from XLS row
+    join_column = plan.join_column
     join_value = row.get(join_column)
     if not join_value:
         log.warning("Join column '%s' not found or empty in row", join_column)
@@ -181,34 +276,15 @@ def merge_lut_data(
         return row
     
     # Merge LUT columns with prefix
-    merged = row.copy()
-    
-    # Check for add_columns (simple mode)
-    add_columns = lookup_config.get("add_columns")
-    
-    if add_columns:
-        # Simple mode: Just add these columns from LUT
-        for lut_column in add_columns:
-            if lut_column in lut_row:
-                prefixed_column = f"{lut_column_prefix}{lut_column}"
-                merged[prefixed_column] = lut_row[lut_column]
-                log.debug(
-                    "Merged LUT column: %s → %s = %s",
-                    lut_column, prefixed_column, lut_row[lut_column]
-                )
-    else:
-        # Legacy mode: Map XML elements to LUT columns (for backward compatibility)
-        for xml_element, lut_column in lookup_config.items():
-            if xml_element in ["required", "join_column", "add_columns"]:
-                continue  # Skip meta fields
-            
-            if lut_column in lut_row:
-                prefixed_column = f"{lut_column_prefix}{lut_column}"
-                merged[prefixed_column] = lut_row[lut_column]
-                log.debug(
-                    "Merged LUT column: %s → %s = %s",
-                    lut_column, prefixed_column, lut_row[lut_column]
-                )
+    merged = row if inplace else row.copy()
+    
+    for lut_column, prefixed_column in plan.add_columns:
+        if lut_column in lut_row:
+            merged[prefixed_column] = lut_row[lut_column]
+            log.debug(
+                "Merged LUT column: %s → %s = %s",
+                lut_column, prefixed_column, lut_row[lut_column]
+            )
     
     return merged
 
@@ -218,87 +294,113 @@ def merge_lut_data(
 # ─────────────────────────────────────────────────────────────────────────────
 
 
-def apply_conversions(
-    raw_value: Any,
+@functools.lru_cache(maxsize=64)
+def _parse_flags(flags_str: str) -> int:
+    """Translate a conversion flags string (e.g. "im") into ``re`` flags."""
+    flags_str = flags_str.lower()
+    flags = 0
+    if "i" in flags_str:
+        flags |= re.IGNORECASE
+    if "m" in flags_str:
+        flags |= re.MULTILINE
+    if "s" in flags_str:
+        flags |= re.DOTALL
+    return flags
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile(pattern: str, flags: int) -> re.Pattern:
+    """
+    Compile and cache a conversion regex.
+    
+    Conversions run once per element per row, so the same handful of
+    patterns is used over and over. Raises re.error for invalid patterns
+    (errors are not cached).
+    """
+    return re.compile(pattern, flags)
+
+
+def compile_conversions(
     conversions: List[Dict[str, str]],
     xml_element: str
-) -> str:
+) -> List[Tuple[re.Pattern, Optional[str]]]:
     """
-    Apply regex conversions with match/replace support.
-    
-    Supports:
-    - match + replace: Regex substitution (with capture groups like \\1, \\2)
-    - match only: Validation (must match or error)
+    Compile a conversion list into (pattern, replace) pairs.
     
-    Conversions are applied in order. First match wins for replacements.
+    replace is None for validation-only conversions. Entries without a
+    match pattern are dropped; invalid regexes are logged and dropped.
     
     Parameters:
-        raw_value: Value from XLS/LUT
         conversions: List of {match, replace?, flags?} dicts
         xml_element: XML element name (for logging)
     
     Returns:
-        Converted value string
-    
-    Raises:
-        ValueError: If validation fails (match without replace didn't match)
-    
-    Example:
-        conversions = [
-            {"match": "(\\d{2})/(\\d{2})/(\\d{4})", "replace": "\\3-\\2-\\1"},  # DD/MM/YYYY → YYYY-MM-DD
-            {"match": "Pre-?Op", "replace": "-1", "flags": "i"}
-        ]
-        result = apply_conversions("15/03/2024", conversions, "DATUMINVUL")
-        # → "2024-03-15"
+        [(compiled pattern, replace string or None), ...]
     """
-    raw_str = str(raw_value).strip() if raw_value is not None else ""
-    
-    if not conversions:
-        return raw_str  # No conversions - pass through
+    compiled = []
     
-    for conv in conversions:
+    for conv in conversions or []:
         match_pattern = conv.get("match", "")
-        replace_str = conv.get("replace")
         flags_str = conv.get("flags", "i")  # Default case-insensitive
         
         if not match_pattern:
             continue
         
-        # Parse regex flags
-        flags = 0
-        if "i" in flags_str.lower():
-            flags |= re.IGNORECASE
-        if "m" in flags_str.lower():
-            flags |= re.MULTILINE
-        if "s" in flags_str.lower():
-            flags |= re.DOTALL
+        try:
+            pattern = _compile(match_pattern, _parse_flags(flags_str))
+        except re.error as e:
+            log.warning(
+                "Invalid regex in %s conversion: '%s' - %s",
+                xml_element, match_pattern, e
+            )
+            continue
         
+        compiled.append((pattern, conv.get("replace")))
+    
+    return compiled
+
+
+def apply_compiled_conversions(
+    raw_value: Any,
+    conversions: List[Tuple[re.Pattern, Optional[str]]],
+    xml_element: str
+) -> str:
+    """
+    Apply conversions prepared by compile_conversions().
+    
+    Same semantics as apply_conversions(), without per-call pattern
+    lookup or flag parsing.
+    """
+    raw_str = _to_str(raw_value)
+    
+    for pattern, replace_str in conversions:
         try:
             if replace_str is not None:
                 # Match + Replace mode: Apply regex substitution
-                result = re.sub(match_pattern, replace_str, raw_str, flags=flags)
+                result = pattern.sub(replace_str, raw_str)
                 if result != raw_str:  # Pattern matched and replaced
                     log.debug(
                         "Converted %s: '%s' → '%s' (matched: %s)",
-                        xml_element, raw_str, result, match_pattern
+                        xml_element, raw_str, result, pattern.pattern
                     )
                     return result
             else:
                 # Validation-only mode: Must match or error
-                if not re.fullmatch(match_pattern, raw_str, flags):
+                if not pattern.fullmatch(raw_str):
                     log.error(
                         "VALIDATION FAILED: %s='%s' does not match pattern '%s'",
-                        xml_element, raw_str, match_pattern
+                        xml_element, raw_str, pattern.pattern
                     )
                     raise ValueError(
                         f"Validation failed for {xml_element}: '{raw_str}' "
-                        f"does not match '{match_pattern}'"
+                        f"does not match '{pattern.pattern}'"
                     )
                 # Matched - continue to next conversion (might have replace)
         except re.error as e:
+            # Invalid replacement template (e.g. unknown group reference)
             log.warning(
                 "Invalid regex in %s conversion: '%s' - %s",
-                xml_element, match_pattern, e
+                xml_element, pattern.pattern, e
             )
             continue
     
@@ -306,41 +408,88 @@ def apply_conversions(
     return raw_str
 
 
+def apply_conversions(
+    raw_value: Any,
+    conversions: List[Dict[str, str]],
+    xml_element: str
+) -> str:
+    """
+    Apply regex conversions with match/replace support.
+    
+    Supports:
+    - match + replace: Regex substitution (with capture groups like \\1, \\2)
+    - match only: Validation (must match or error)
+    
+    Conversions are applied in order. First match wins for replacements.
+    
+    Parameters:
+        raw_value: Value from XLS/LUT
+        conversions: List of {match, replace?, flags?} dicts
+        xml_element: XML element name (for logging)
+    
+    Returns:
+        Converted value string
+    
+    Raises:
+        ValueError: If validation fails (match without replace didn't match)
+    
+    Example:
+        conversions = [
+            {"match": "(\\d{2})/(\\d{2})/(\\d{4})", "replace": "\\3-\\2-\\1"},  # DD/MM/YYYY → YYYY-MM-DD
+            {"match": "Pre-?Op", "replace": "-1", "flags": "i"}
+        ]
+        result = apply_conversions("15/03/2024", conversions, "DATUMINVUL")
+        # → "2024-03-15"
+    """
+    if not conversions:
+        # No conversions - pass through
+        return _to_str(raw_value)
+    
+    return apply_compiled_conversions(
+        raw_value, compile_conversions(conversions, xml_element), xml_element
+    )
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Element Extraction
 # ─────────────────────────────────────────────────────────────────────────────
 
 
-def extract_elements(row: Dict[str, Any], prom_config: Dict[str, Any]) -> Dict[str, str]:
+# One entry per mapped XML element:
+#   (xml_element, virtual_columns, column_spec, column_is_magic, conversions)
+# virtual_columns is [(key, value, is_magic), ...] in definition order.
+ExtractionPlan = List[
+    Tuple[str, List[Tuple[str, Any, bool]], Any, bool, List[Tuple[re.Pattern, Optional[str]]]]
+]
+
+
+def _is_magic(value: Any) -> bool:
+    """True if *value* is a magic function expression or variable reference."""
+    return isinstance(value, str) and ('$' in value or '%(' in value)
+
+
+def _normalize_magic(value: str) -> str:
+    """Trim whitespace around each line of a multi-line magic expression."""
+    if '\n' in value:
+        return '\n'.join(line.strip() for line in value.split('\n'))
+    return value
+
+
+def build_extraction_plan(prom_config: Dict[str, Any]) -> ExtractionPlan:
     """
-    Extract all XML elements from row using PROM config mappings.
-    
-    v1.4.9: Now supports magic functions for dynamic calculations.
+    Pre-resolve a PROM config section into an extraction plan.
     
-    Processing order:
-    1. Start with base row data (XLS + LUT columns)
-    2. Process virtual columns in definition order (any key except 'column', 'value', meta fields)
-    3. Process 'column' key last (may reference virtual columns)
-    4. Apply regex conversions
+    Everything that does not depend on row data (meta-field filtering,
+    column specs, magic-expression normalization, regex compilation) is
+    done once here instead of once per row in extract_elements().
     
     Parameters:
-        row: Merged XLS + LUT data (with prefixed LUT columns)
         prom_config: [PROM.<key>] config section
     
     Returns:
-        Dict[xml_element → converted_value]
-    
-    Example (v1.4.9 with magic functions):
-        prom_config = {
-            "FUPK": {
-                "__diff_months": "$DATE_DIFF(%(survey),%(surgery),months)",
-                "__computed": "$IF($LT(%(__diff_months),0),-1,3)",
-                "column": "$FIRST_N(%(__computed),%(Period))",
-                "value": [{"match": "Pre-Op", "replace": "-1"}]
-            }
-        }
+        ExtractionPlan for extract_with_plan()
     """
-    elements = {}
+    plan: ExtractionPlan = []
     
     for xml_element, element_config in prom_config.items():
         # Skip meta fields
@@ -351,24 +500,56 @@ def extract_elements(row: Dict[str, Any], prom_config: Dict[str, Any]) -> Dict[s
         if not isinstance(element_config, dict):
             continue
         
-        # Start with a copy of row data for this element
-        # This allows virtual columns to reference each other
-        element_row_data = dict(row)
+        column_spec = element_config.get("column")
+        if not column_spec:
+            continue
         
-        # Step 1: Process all keys except 'column' and 'value' (virtual columns)
-        # These are processed in definition order
+        # Virtual columns: all keys except 'column' and 'value', in definition order
+        virtual_columns = []
         for key, value in element_config.items():
             if key in ['column', 'value', 'lookup']:
                 continue
+            if _is_magic(value):
+                virtual_columns.append((key, _normalize_magic(value), True))
+            else:
+                virtual_columns.append((key, value, False))
+        
+        column_is_magic = _is_magic(column_spec)
+        if column_is_magic:
+            column_spec = _normalize_magic(column_spec)
+        
+        conversions = compile_conversions(element_config.get("value", []), xml_element)
+        
+        plan.append((xml_element, virtual_columns, column_spec, column_is_magic, conversions))
+    
+    return plan
+
+
+def extract_with_plan(row: Dict[str, Any], plan: ExtractionPlan) -> Dict[str, str]:
+    """
+    Extract all XML elements from row using a precomputed extraction plan.
+    
+    Parameters:
+        row: Merged XLS + LUT data (with prefixed LUT columns)
+        plan: Result of build_extraction_plan() for the row's PROM type
+    
+    Returns:
+        Dict[xml_element → converted_value]
+    """
+    elements = {}
+    
+    for xml_element, virtual_columns, column_spec, column_is_magic, conversions in plan:
+        if virtual_columns:
+            # Work on a copy of row data for this element
+            # This allows virtual columns to reference each other
+            element_row_data = dict(row)
             
-            # Check if value contains magic functions or variables
-            if isinstance(value, str) and ('$' in value or '%(' in value):
-                # Trim whitespace for multi-line values
-                if '\n' in value:
-                    value = '\n'.join(line.strip() for line in value.split('\n'))
-                
-                # Evaluate magic function
-                if MAGIC_FUNCTIONS_AVAILABLE:
+            # Step 1: Process virtual columns in definition order
+            for key, value, is_magic in virtual_columns:
+                if not is_magic:
+                    # Not a magic function, just store as-is
+                    element_row_data[key] = value
+                elif MAGIC_FUNCTIONS_AVAILABLE:
                     try:
                         computed_value = evaluate_magic(value, element_row_data)
                         element_row_data[key] = computed_value
@@ -379,22 +560,12 @@ def extract_elements(row: Dict[str, Any], prom_config: Dict[str, Any]) -> Dict[s
                 else:
                     log.warning("Magic functions not available (import failed). Using literal value for %s.%s", xml_element, key)
                     element_row_data[key] = value
-            else:
-                # Not a magic function, just store as-is
-                element_row_data[key] = value
+        else:
+            # No virtual columns - row data is only read
+            element_row_data = row
         
         # Step 2: Process 'column' key (final value selection)
-        column_spec = element_config.get("column")
-        if not column_spec:
-            continue
-        
-        # Column can be a magic function or plain column name
-        if isinstance(column_spec, str) and ('$' in column_spec or '%(' in column_spec):
-            # Trim whitespace for multi-line
-            if '\n' in column_spec:
-                column_spec = '\n'.join(line.strip() for line in column_spec.split('\n'))
-            
-            # Evaluate magic function
+        if column_is_magic:
             if MAGIC_FUNCTIONS_AVAILABLE:
                 try:
                     raw_value = evaluate_magic(column_spec, element_row_data)
@@ -410,19 +581,17 @@ def extract_elements(row: Dict[str, Any], prom_config: Dict[str, Any]) -> Dict[s
             raw_value = element_row_data.get(column_spec)
         
         # Skip empty values
-        if raw_value is None or str(raw_value).strip() == "":
+        if _is_empty(raw_value):
             continue
         
         # Auto-convert datetime objects to date strings (for XSD compliance)
-        from datetime import datetime, date
         if isinstance(raw_value, (datetime, date)):
             raw_value = raw_value.strftime("%Y-%m-%d") if isinstance(raw_value, datetime) else raw_value.isoformat()
             log.debug("Converted datetime to date: %s = %s", xml_element, raw_value)
         
         # Step 3: Apply regex conversions
-        conversions = element_config.get("value", [])
         try:
-            converted = apply_conversions(raw_value, conversions, xml_element)
+            converted = apply_compiled_conversions(raw_value, conversions, xml_element)
             elements[xml_element] = converted
         except ValueError as e:
             # Validation failed
@@ -432,6 +601,38 @@ def extract_elements(row: Dict[str, Any], prom_config: Dict[str, Any]) -> Dict[s
     return elements
 
 
+def extract_elements(row: Dict[str, Any], prom_config: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Extract all XML elements from row using PROM config mappings.
+    
+    v1.4.9: Now supports magic functions for dynamic calculations.
+    
+    Processing order:
+    1. Start with base row data (XLS + LUT columns)
+    2. Process virtual columns in definition order (any key except 'column', 'value', meta fields)
+    3. Process 'column' key last (may reference virtual columns)
+    4. Apply regex conversions
+    
+    Parameters:
+        row: Merged XLS + LUT data (with prefixed LUT columns)
+        prom_config: [PROM.<key>] config section
+    
+    Returns:
+        Dict[xml_element → converted_value]
+    
+    Example (v1.4.9 with magic functions):
+        prom_config = {
+            "FUPK": {
+                "__diff_months": "$DATE_DIFF(%(survey),%(surgery),months)",
+                "__computed": "$IF($LT(%(__diff_months),0),-1,3)",
+                "column": "$FIRST_N(%(__computed),%(Period))",
+                "value": [{"match": "Pre-Op", "replace": "-1"}]
+            }
+        }
+    """
+    return extract_with_plan(row, build_extraction_plan(prom_config))
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # PROM Detection
 # ─────────────────────────────────────────────────────────────────────────────
@@ -477,14 +678,76 @@ def detect_prom_type(row: Dict[str, Any], prom_configs: Dict[str, Any], row_numb
         
         # IMPORTANT: Check explicitly for None, not just truthiness
         # This allows value 0 (zero) to be valid, which is needed for KOOS/HOOS questions
-        if value is not None and str(value).strip() != "":
+        if not _is_empty(value):
             log.debug("PROM %s detected: detection_column '%s' = %s%s", prom_key, detection_col, value, row_info)
             return prom_key
         else:
             log.debug("PROM %s: detection_column '%s' is empty/None%s (value: %s)", 
                      prom_key, detection_col, row_info, repr(value))
     
-    # No PROM type detected - log detailed reason
+    _log_no_prom_detected(row, prom_configs, row_info)
+    return None
+
+
+def build_detection_candidates(
+    headers: List[str],
+    prom_configs: Dict[str, Any]
+) -> List[Tuple[str, str, int]]:
+    """
+    Shortlist the PROM types that can be detected in a file.
+    
+    All rows of a file share the same headers, so PROM types whose
+    detection_column is absent can never match and are dropped once per
+    file instead of being re-checked for every row. Config order is kept,
+    so "first matching detection_column wins" still holds.
+    
+    Returns:
+        [(prom_key, detection_column, column_index), ...]
+    """
+    # Later duplicates win, matching dict(zip(headers, row_values))
+    header_index = {h: i for i, h in enumerate(headers)}
+    candidates = []
+    for prom_key, prom_config in prom_configs.items():
+        detection_col = prom_config.get("detection_column")
+        if not detection_col:
+            log.debug("PROM %s: No detection_column configured", prom_key)
+        elif detection_col in header_index:
+            candidates.append((prom_key, detection_col, header_index[detection_col]))
+        else:
+            log.debug("PROM %s: detection_column '%s' not found in file", prom_key, detection_col)
+    return candidates
+
+
+def detect_prom_type_fast(
+    row_values: Tuple[Any, ...],
+    candidates: List[Tuple[str, str, int]],
+    headers: List[str],
+    prom_configs: Dict[str, Any],
+    row_number: Optional[int] = None
+) -> Optional[str]:
+    """
+    Detect PROM type from raw row values using build_detection_candidates().
+    
+    Same result as detect_prom_type() for rows of that file, but reads the
+    detection cells by index, so no row dict is needed. row_values must be
+    padded to len(headers). headers and prom_configs are only used to
+    report why detection failed.
+    """
+    for prom_key, detection_col, col_idx in candidates:
+        value = row_values[col_idx]
+        # Explicit None check so that 0 (zero) counts as a valid value
+        if not _is_empty(value):
+            log.debug("PROM %s detected: detection_column '%s' = %s (Excel row %s)",
+                      prom_key, detection_col, value, row_number)
+            return prom_key
+    
+    row_info = f" (Excel row {row_number})" if row_number else ""
+    _log_no_prom_detected(dict(zip(headers, row_values)), prom_configs, row_info)
+    return None
+
+
+def _log_no_prom_detected(row: Dict[str, Any], prom_configs: Dict[str, Any], row_info: str) -> None:
+    """Log why no PROM type could be detected for a row."""
     log.warning("No PROM type detected%s. Checked detection columns:", row_info)
     for prom_key, prom_config in prom_configs.items():
         detection_col = prom_config.get("detection_column")
@@ -496,8 +759,6 @@ def detect_prom_type(row: Dict[str, Any], prom_configs: Dict[str, Any], row_numb
             else:
                 log.warning("  - %s.detection_column='%s': column not found in Excel", 
                            prom_key, detection_col)
-    
-    return None
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -505,6 +766,11 @@ def detect_prom_type(row: Dict[str, Any], prom_configs: Dict[str, Any], row_numb
 # ─────────────────────────────────────────────────────────────────────────────
 
 
+# Document framing written around the streamed <questionaire> elements
+_XML_HEADER = '<?xml version="1.0" ?>\n<LROIPROM>\n  <questionaires>\n'
+_XML_FOOTER = '  </questionaires>\n</LROIPROM>'
+
+
 # Element order per PROM type (for XSD compliance)
 XSD_ELEMENT_ORDER = {
     "OKS": [
@@ -580,6 +846,258 @@ def build_questionnaire(
     return q
 
 
+def write_questionnaire(
+    fp: TextIO,
+    elements: Dict[str, str],
+    prom_key: str,
+    hospital: int
+) -> None:
+    """
+    Build a questionnaire and write it, indented, to an open text stream.
+    
+    The element is serialized on its own and discarded, so callers can
+    stream any number of questionnaires without keeping a tree in memory.
+    Output is framed by _XML_HEADER / _XML_FOOTER.
+    """
+    q = build_questionnaire(elements, prom_key, hospital)
+    ET.indent(q, space="  ", level=2)
+    fp.write("    ")
+    fp.write(ET.tostring(q, encoding="unicode"))
+    fp.write("\n")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# File Processing
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+def _process_one_file(
+    xls_path: str | Path,
+    prom_configs: Dict[str, Any],
+    lut_index: Dict[str, Dict[str, Any]],
+    hospital: int,
+    lut_column_prefix: str,
+    fp: TextIO
+) -> Tuple[int, int]:
+    """
+    Convert the rows of one XLS file, writing questionnaires to *fp*.
+    
+    Parameters:
+        xls_path: Path of the input Excel file
+        prom_configs: config["PROM"]
+        lut_index: LUT data loaded by load_lut() (empty if no LUT)
+        hospital: Hospital number
+        lut_column_prefix: Prefix for LUT columns
+        fp: Text stream receiving <questionaire> blocks
+    
+    Returns:
+        (n_converted, n_skipped)
+    """
+    log.info("Processing XLS: %s", xls_path)
+    
+    n_converted = 0
+    n_skipped = 0
+    
+    # Track PROM type for single detection log
+    current_file_prom = None
+    
+    # Extraction and lookup plans per PROM type, built on first use
+    extraction_plans: Dict[str, ExtractionPlan] = {}
+    lookup_plans: Dict[str, LookupPlan] = {}
+    
+    wb = openpyxl.load_workbook(xls_path, read_only=True, data_only=True)
+    ws = wb.active
+    
+    # Get headers from first row (rows are streamed, not materialised)
+    row_iter = ws.iter_rows(values_only=True)
+    first = next(row_iter, None)
+    if first is None:
+        log.warning("XLS file appears to be empty: %s", xls_path)
+        wb.close()
+        return 0, 0
+    
+    headers = _header_names(first)
+    n_headers = len(headers)
+    candidate_proms = build_detection_candidates(headers, prom_configs)
+    
+    # Process data rows (enumerate to track row numbers)
+    for row_idx, row_values in enumerate(row_iter, start=2):  # Start at 2 (header=1, first data=2)
+        if row_values.count(None) == len(row_values):
+            continue  # Blank row
+        
+        # Pad short rows so missing cells map to None
+        if len(row_values) < n_headers:
+            row_values = row_values + (None,) * (n_headers - len(row_values))
+        
+        # Detect PROM type (first match wins) straight from the row tuple
+        prom_key = detect_prom_type_fast(
+            row_values, candidate_proms, headers, prom_configs, row_number=row_idx
+        )
+        
+        if not prom_key:
+            log.warning("No PROM type detected for Excel row %d (skipped)", row_idx)
+            n_skipped += 1
+            continue
+        
+        # Build row dict only for rows that will be converted
+        row = dict(zip(headers, row_values))
+        
+        # Log detection once per file
+        if prom_key != current_file_prom:
+            current_file_prom = prom_key
+            log.info("Detected PROM type: %s", prom_key)
+        
+        prom_config = prom_configs[prom_key]
+        
+        # Merge LUT data if required (row is ours, so merge in place)
+        if lut_index:
+            lookup_plan = lookup_plans.get(prom_key)
+            if lookup_plan is None:
+                lookup_plan = lookup_plans[prom_key] = build_lookup_plan(prom_config, lut_column_prefix)
+            row = merge_lut_with_plan(row, lut_index, lookup_plan, inplace=True)
+        
+        # Extract all XML elements (plan is built once per PROM type)
+        plan = extraction_plans.get(prom_key)
+        if plan is None:
+            plan = extraction_plans[prom_key] = build_extraction_plan(prom_config)
+        try:
+            elements = extract_with_plan(row, plan)
+        except Exception as e:
+            log.error("Failed to extract elements: %s", e)
+            n_skipped += 1
+            continue
+        
+        # Validate required fields
+        if not elements.get("UPNNUM"):
+            log.warning("Row skipped: missing UPNNUM")
+            n_skipped += 1
+            continue
+        
+        if not elements.get("DATUMINVUL"):
+            log.warning("Row skipped: missing DATUMINVUL")
+            n_skipped += 1
+            continue
+        
+        # Build questionnaire and write it out immediately
+        write_questionnaire(fp, elements, prom_key, hospital)
+        n_converted += 1
+        
+        log.info(
+            "Converted %s questionnaire: UPNNUM=%s",
+            prom_key, elements.get("UPNNUM")
+        )
+    
+    wb.close()
+    return n_converted, n_skipped
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Parallel File Processing
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+# Per-process state installed by _init_worker (shipped once per worker,
+# not once per file)
+_worker_args: Optional[Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], int, str]] = None
+
+
+class _ForwardHandler(logging.Handler):
+    """Re-dispatch records received from worker processes to a logger."""
+    
+    def __init__(self, logger: logging.Logger) -> None:
+        super().__init__()
+        self._logger = logger
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        self._logger.handle(record)
+
+
+def _init_worker(
+    log_queue: Any,
+    level: int,
+    prom_configs: Dict[str, Any],
+    lut_index: Dict[str, Dict[str, Any]],
+    hospital: int,
+    lut_column_prefix: str
+) -> None:
+    """
+    Initialise a worker process.
+    
+    Workers are spawned, so they start with an unconfigured logger. Log
+    records are sent back to the parent through *log_queue*, and the
+    console, log files and GUI receive them there as usual.
+    """
+    from logger import make_queue_handler
+    
+    global _worker_args
+    _worker_args = (prom_configs, lut_index, hospital, lut_column_prefix)
+    
+    log.handlers[:] = [make_queue_handler(log_queue)]
+    log.setLevel(level)
+    log.propagate = False
+
+
+def _convert_file_worker(xls_path: str | Path) -> Tuple[str, int, int]:
+    """
+    Worker entry point: convert one file into an XML fragment.
+    
+    Returns serialized <questionaire> blocks rather than Elements, which
+    are cheaper to send back to the parent process.
+    """
+    prom_configs, lut_index, hospital, lut_column_prefix = _worker_args
+    buf = io.StringIO()
+    n_converted, n_skipped = _process_one_file(
+        xls_path, prom_configs, lut_index, hospital, lut_column_prefix, buf
+    )
+    return buf.getvalue(), n_converted, n_skipped
+
+
+def _process_files_parallel(
+    xls_paths: List[str | Path],
+    prom_configs: Dict[str, Any],
+    lut_index: Dict[str, Dict[str, Any]],
+    hospital: int,
+    lut_column_prefix: str,
+    fp: TextIO,
+    max_workers: int
+) -> Tuple[int, int]:
+    """
+    Convert files in a process pool, writing fragments to *fp* in input order.
+    
+    Files are independent, so each one is parsed on its own core. Output
+    order matches xls_paths regardless of which file finishes first.
+    
+    Returns:
+        (n_converted, n_skipped)
+    """
+    # spawn on every platform: forking a process that already runs logging
+    # and GUI threads can copy held locks into the children
+    ctx = multiprocessing.get_context("spawn")
+    log_queue = ctx.Queue()
+    listener = logging.handlers.QueueListener(log_queue, _ForwardHandler(log))
+    listener.start()
+    
+    n_converted = 0
+    n_skipped = 0
+    
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(log_queue, log.getEffectiveLevel(), prom_configs,
+                      lut_index, hospital, lut_column_prefix),
+        ) as pool:
+            for fragment, n_conv, n_skip in pool.map(_convert_file_worker, xls_paths):
+                fp.write(fragment)
+                n_converted += n_conv
+                n_skipped += n_skip
+    finally:
+        listener.stop()
+    
+    return n_converted, n_skipped
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Main Conversion Logic
 # ─────────────────────────────────────────────────────────────────────────────
@@ -590,10 +1108,14 @@ def convert(
     config: Dict[str, Any],
     lut_path: Optional[str | Path] = None,
     output_path: Optional[str | Path] = None,
-) -> Tuple[str, int, int]:
+) -> Tuple[Optional[str], int, int]:
     """
     Convert one or more XLS files to a single LROI PROMs XML document.
     
+    Files are converted one after another unless [defaults] workers in
+    config.toml is above 1; then several files are processed in parallel
+    worker processes. Output order always follows xls_paths.
+    
     Parameters:
         xls_paths: Paths of the input Excel files
         config: Parsed config.toml as nested dict
@@ -602,9 +1124,13 @@ def convert(
     
     Returns:
         (xml_string, n_converted, n_skipped)
+        xml_string is None when output_path is given: questionnaires are
+        streamed straight to the file instead of being kept in memory.
     
     Example:
-        xml, converted, skipped = convert(
+        xml, converted, skipped = convert(["data.xlsx"], config)
+        
+        _, converted, skipped = convert(
             ["data.xlsx"],
             config,
             lut_path="demographics.xlsx",
@@ -613,6 +1139,9 @@ def convert(
     """
     hospital = int(config.get("defaults", {}).get("hospital", 0))
     lut_column_prefix = config.get("defaults", {}).get("lut_column_prefix", "__LUT__")
+    # Worker processes pay a start-up and import cost per process, which
+    # only pays off for large batches, so parallelism is opt-in
+    workers = int(config.get("defaults", {}).get("workers", 1)) or (os.cpu_count() or 1)
     prom_configs = config.get("PROM", {})
     
     # Load LUT if provided
@@ -628,109 +1157,56 @@ def convert(
             if Path(p).resolve() != lut_path_resolved
         ]
     
-    # Build XML root
-    root = ET.Element("LROIPROM")
-    questionaires = ET.SubElement(root, "questionaires")
-    
-    n_converted = 0
-    n_skipped = 0
+    max_workers = min(len(xls_paths), workers)
     
-    # Track PROM type per file for single detection log
-    current_file_prom = None
+    # Stream questionnaires to the output as they are built, so memory does
+    # not grow with the number of rows. Without an output_path the document
+    # is assembled in memory and returned. A file is written under a
+    # temporary name and only moved into place once conversion succeeds.
+    if output_path:
+        tmp_path: Optional[Path] = Path(f"{output_path}.part")
+        fp: TextIO = open(tmp_path, "w", encoding="utf-8")
+    else:
+        tmp_path = None
+        fp = io.StringIO()
     
-    for xls_path in xls_paths:
-        log.info("Processing XLS: %s", xls_path)
-        
-        wb = openpyxl.load_workbook(xls_path, read_only=True, data_only=True)
-        ws = wb.active
-        
-        # Get headers from first row
-        rows = list(ws.iter_rows(values_only=True))
-        if not rows:
-            log.warning("XLS file appears to be empty: %s", xls_path)
-            wb.close()
-            continue
-        
-        headers = [str(h).strip() if h is not None else "" for h in rows[0]]
+    try:
+        fp.write(_XML_HEADER)
         
-        # Process data rows (enumerate to track row numbers)
-        for row_idx, row_values in enumerate(rows[1:], start=2):  # Start at 2 (header=1, first data=2)
-            if all(v is None for v in row_values):
-                continue  # Blank row
-            
-            # Build row dict
-            row = {
-                headers[i]: (row_values[i] if i < len(row_values) else None)
-                for i in range(len(headers))
-            }
-            
-            # Detect PROM type (first match wins)
-            prom_key = detect_prom_type(row, prom_configs, row_number=row_idx)
-            
-            if not prom_key:
-                log.warning("No PROM type detected for Excel row %d (skipped)", row_idx)
-                n_skipped += 1
-                continue
-            
-            # Log detection once per file
-            if prom_key != current_file_prom:
-                current_file_prom = prom_key
-                log.info("Detected PROM type: %s", prom_key)
-            
-            prom_config = prom_configs[prom_key]
-            
-            # Merge LUT data if required
-            if lut_index:
-                row = merge_lut_data(row, lut_index, prom_config, lut_column_prefix)
-            
-            # Extract all XML elements
-            try:
-                elements = extract_elements(row, prom_config)
-            except Exception as e:
-                log.error("Failed to extract elements: %s", e)
-                n_skipped += 1
-                continue
-            
-            # Validate required fields
-            if not elements.get("UPNNUM"):
-                log.warning("Row skipped: missing UPNNUM")
-                n_skipped += 1
-                continue
-            
-            if not elements.get("DATUMINVUL"):
-                log.warning("Row skipped: missing DATUMINVUL")
-                n_skipped += 1
-                continue
-            
-            # Build questionnaire
-            q = build_questionnaire(elements, prom_key, hospital)
-            questionaires.append(q)
-            n_converted += 1
-            
-            log.info(
-                "Converted %s questionnaire: UPNNUM=%s",
-                prom_key, elements.get("UPNNUM")
+        if max_workers > 1:
+            n_converted, n_skipped = _process_files_parallel(
+                xls_paths, prom_configs, lut_index, hospital,
+                lut_column_prefix, fp, max_workers
             )
+        else:
+            n_converted = 0
+            n_skipped = 0
+            for xls_path in xls_paths:
+                n_conv, n_skip = _process_one_file(
+                    xls_path, prom_configs, lut_index, hospital,
+                    lut_column_prefix, fp
+                )
+                n_converted += n_conv
+                n_skipped += n_skip
         
-        wb.close()
+        fp.write(_XML_FOOTER)
+        xml_string = fp.getvalue() if tmp_path is None else None
+    except BaseException:
+        fp.close()
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True)
+        raise
+    
+    fp.close()
     
     log.info("Conversion complete: %d questionnaires converted", n_converted)
     
     if n_skipped > 0:
         log.warning("%d questionnaires skipped", n_skipped)
     
-    # Convert to pretty XML string
-    rough_string = ET.tostring(root, encoding="unicode")
-    dom = minidom.parseString(rough_string)
-    pretty_xml = dom.toprettyxml(indent="  ")
-    
-    # Remove extra blank lines
-    lines = [line for line in pretty_xml.split("\n") if line.strip()]
-    xml_string = "\n".join(lines)
-    
-    # Write to file if output_path provided
-    if output_path:
-        Path(output_path).write_text(xml_string, encoding="utf-8")
+    # Move finished file into place
+    if tmp_path is not None:
+        os.replace(tmp_path, output_path)
         log.info("XML written to: %s", output_path)
     
-    return xml_string, n_converted, n_skipped
\ No newline at end of file
+    return xml_string, n_converted, n_skipped
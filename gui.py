@@ -9,34 +9,166 @@ run the conversion and view log output inline.
 
 from __future__ import annotations
 
+import collections
 import logging
+import logging.handlers
 import os
 import queue
 import sys
 import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 try:
     import tkinter as tk
-    from tkinter import filedialog, messagebox, scrolledtext, ttk
+    from tkinter import ttk
 except ImportError:
     print("ERROR: tkinter is not available on this system.", file=sys.stderr)
     sys.exit(1)
 
+# ─────────────────────────────────────────────────────────────────────────────
+# File name templates
+# ─────────────────────────────────────────────────────────────────────────────
+
+# {appname} in GUI file name templates (see main._template_to_strftime)
+_APPNAME = "lroi_converter"
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Queue handler – funnels log records to the GUI text widget
 # ─────────────────────────────────────────────────────────────────────────────
 
 
-class _QueueHandler(logging.Handler):
-    def __init__(self, log_queue: queue.Queue) -> None:
+_GUI_LOG_FORMAT = "%(asctime)s  %(levelname)-8s  %(message)s"
+
+# Log level name -> colour tag of the log widget
+_LEVEL_TAG = {
+    "DEBUG":    "DEBUG",
+    "INFO":     "INFO",
+    "WARNING":  "WARNING",
+    "ERROR":    "ERROR",
+    "CRITICAL": "ERROR",
+}
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler attached to the ``lroi`` logger on behalf of the GUI.
+
+    The queue is bounded; when the GUI cannot keep up (e.g. DEBUG logging of
+    a large batch) new records are dropped and counted instead of blocking
+    the conversion or growing memory without limit.
+
+    Records logged on the Tk thread itself (e.g. from a button callback) are
+    written to the log widget directly, skipping the queue round trip, when
+    no queued records are waiting to be shown before them.
+    """
+
+    def __init__(self, log_queue: queue.Queue,
+                 gui: Optional["ConverterGUI"] = None) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._gui = gui
+        self._main_tid = threading.get_ident()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        gui = self._gui
+        if (gui is not None and threading.get_ident() == self._main_tid
+                and hasattr(gui, "_log_text") and self.queue.empty()):
+            try:
+                # Lines the listener has already handed over come first
+                gui._tk_sink.flush_pending()
+                gui._append_batch([(record.levelname, gui._tk_sink.format(record))])
+            except Exception:
+                self.handleError(record)
+            return
+        super().emit(record)
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def take_dropped(self) -> int:
+        """Return and reset the number of records dropped so far."""
+        with self.lock:
+            dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class _TkSinkHandler(logging.Handler):
+    """
+    Runs on the QueueListener thread: formats records and hands them to the
+    Tk main loop.  Lines are collected in a pending list and a single
+    ``after_idle`` flush is scheduled per burst, so an idle GUI does no work.
+    """
+
+    def __init__(self, gui: "ConverterGUI", source: _QueueHandler) -> None:
         super().__init__()
-        self._queue = log_queue
+        self.gui = gui
+        self._source = source
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, str]] = []
+        self._scheduled = False
+        # Set once the main loop has ended: Tk calls from this thread would
+        # then block for about a second each before failing
+        self.closing = False
 
     def emit(self, record: logging.LogRecord) -> None:
-        self._queue.put(self.format(record))
+        if self.closing:
+            return
+        try:
+            msgs = []
+            dropped = self._source.take_dropped()
+            if dropped:
+                msgs.append(self.flood_line(dropped))
+            msgs.append((record.levelname, self.format(record)))
+        except Exception:
+            self.handleError(record)
+            return
+        with self._lock:
+            self._pending.extend(msgs)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        try:
+            self.gui.root.after_idle(self.flush_pending)
+        except (RuntimeError, tk.TclError):
+            # Main loop not running (yet / any more). _scheduled stays set so
+            # later records do not retry; run() flushes on start
+            pass
+
+    def flood_line(self, dropped: int) -> Tuple[str, str]:
+        """Return the log line reporting *dropped* lost records."""
+        return self.notice_line(f"[log flooded: {dropped} messages dropped]")
+
+    def notice_line(self, text: str) -> Tuple[str, str]:
+        """Return *text* formatted as a GUI-generated WARNING line."""
+        return ("WARNING", self.format(logging.makeLogRecord({
+            "name": "lroi",
+            "levelno": logging.WARNING,
+            "levelname": "WARNING",
+            "msg": text,
+        })))
+
+    def flush_pending(self) -> None:
+        """Insert all pending lines into the log widget (Tk thread only)."""
+        with self._lock:
+            msgs, self._pending = self._pending, []
+            self._scheduled = False
+        if msgs:
+            self.gui._append_batch(msgs)
+
+
+class _BlockingStopListener(logging.handlers.QueueListener):
+    """
+    QueueListener for a bounded queue: stop() waits for room for its
+    sentinel instead of failing with queue.Full when the queue is full.
+    """
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -51,6 +183,10 @@ class ConverterGUI:
     _PAD     = 8
     _WIDTH   = 900
     _HEIGHT  = 680
+    _MAX_LOG_LINES = 5000   # older lines are pruned from the log widget
+    _LOG_QUEUE_SIZE = 10000 # records beyond this are dropped (and counted)
+    _DETACH_BATCH  = 32     # batches larger than this are inserted unmapped
+    _SCROLL_MS     = 100    # autoscroll at most this often
 
     def __init__(
         self,
@@ -68,8 +204,18 @@ class ConverterGUI:
         """
         self._config = config
         self._prepopulate = prepopulate or {}
-        self._log_queue: queue.Queue = queue.Queue()
-        self._running = False
+        self._log_queue: queue.Queue = queue.Queue(maxsize=self._LOG_QUEUE_SIZE)
+        # Conversions run one at a time on a single long-lived worker thread
+        self._job_queue: queue.Queue = queue.Queue()
+        self._log_line_count = 0
+        # Autoscroll: follow the end of the log unless the user scrolled up;
+        # see("end") runs at most once per _SCROLL_MS
+        self._autoscroll = True
+        self._scroll_pending = False
+        # Lines held back while the log display is paused or not visible
+        self._paused_buffer: collections.deque = collections.deque(
+            maxlen=self._MAX_LOG_LINES)
+        self._paused_evicted = 0  # lines pushed out of the full buffer
 
         # ── Root window ───────────────────────────────────────────────────────
         self.root = tk.Tk()
@@ -83,6 +229,9 @@ class ConverterGUI:
         self._connect_logger()
         self._apply_prepopulate()
 
+        threading.Thread(target=self._worker_loop, name="lroi-gui-worker",
+                         daemon=True).start()
+
     # ─────────────────────────────────────────────────────────────────────────
     # UI construction
     # ─────────────────────────────────────────────────────────────────────────
@@ -98,13 +247,15 @@ class ConverterGUI:
         # XLS files / folders
         ttk.Label(top, text="Input XLS file(s) / folder(s):").grid(
             row=0, column=0, sticky="w", pady=2)
-        self._xls_var = tk.StringVar()
-        ttk.Entry(top, textvariable=self._xls_var).grid(
-            row=0, column=1, sticky="ew", padx=(4, 0))
+        # Selected entries live in a list; the Listbox only displays them
+        self._xls_paths: List[str] = []
+        self._xls_listbox = tk.Listbox(top, height=3, activestyle="none")
+        self._xls_listbox.grid(row=0, column=1, sticky="ew", padx=(4, 0))
         btn_frame = ttk.Frame(top)
         btn_frame.grid(row=0, column=2, padx=(4, 0))
         ttk.Button(btn_frame, text="Files…",  command=self._browse_xls_files).pack(side="left")
         ttk.Button(btn_frame, text="Folder…", command=self._browse_xls_folder).pack(side="left", padx=(2, 0))
+        ttk.Button(btn_frame, text="Clear",   command=self._clear_xls).pack(side="left", padx=(2, 0))
 
         # LUT file
         ttk.Label(top, text="Lookup table (LUT):").grid(
@@ -214,16 +365,52 @@ class ConverterGUI:
             self._output_entry.configure(state="disabled")
             self._output_browse_btn.configure(state="disabled")
 
+        # ── Bottom frame: action buttons ──────────────────────────────────────
+        bot = ttk.Frame(self.root, padding=(p, 0, p, p))
+        bot.grid(row=2, column=0, sticky="ew")
+
+        self._run_btn = ttk.Button(
+            bot, text="▶  Run Conversion", command=self._run)
+        self._run_btn.pack(side="left")
+
+        ttk.Button(bot, text="Clear Log", command=self._clear_log).pack(
+            side="left", padx=(p, 0))
+        self._log_paused = tk.BooleanVar(value=False)
+        ttk.Checkbutton(bot, text="Pause log display", variable=self._log_paused,
+                        command=self._flush_paused_buffer).pack(
+            side="left", padx=(p, 0))
+        ttk.Button(bot, text="Quit", command=self.root.destroy).pack(
+            side="right")
+
+        self._status_var = tk.StringVar(value="Ready.")
+        ttk.Label(bot, textvariable=self._status_var).pack(
+            side="left", padx=(p * 2, 0))
+
+        # The log panel is the most expensive part; build it once the
+        # window is on screen
+        self.root.after_idle(self._build_secondary_ui)
+
+    def _build_secondary_ui(self) -> None:
+        """Build the log panel (scheduled from _build_ui via after_idle)."""
+        from tkinter import scrolledtext
+
+        p = self._PAD
+
         mid = ttk.LabelFrame(self.root, text="Log", padding=p)
         mid.grid(row=1, column=0, sticky="nsew", padx=p, pady=(0, p))
         mid.rowconfigure(0, weight=1)
         mid.columnconfigure(0, weight=1)
 
+        # No wrapping and no undo history: both cost time on every insert
         self._log_text = scrolledtext.ScrolledText(
-            mid, state="disabled", wrap="word",
+            mid, state="disabled", wrap="none",
+            undo=False, autoseparators=False, maxundo=0,
             font=("Courier", 9), background="#1e1e1e", foreground="#d4d4d4",
         )
         self._log_text.grid(row=0, column=0, sticky="nsew")
+        xbar = ttk.Scrollbar(mid, orient="horizontal", command=self._log_text.xview)
+        xbar.grid(row=1, column=0, sticky="ew")
+        self._log_text.configure(xscrollcommand=xbar.set)
 
         # Tag colours
         self._log_text.tag_config("INFO",    foreground="#6db6ff")
@@ -231,87 +418,153 @@ class ConverterGUI:
         self._log_text.tag_config("ERROR",   foreground="#f44747")
         self._log_text.tag_config("DEBUG",   foreground="#808080")
 
-        # ── Bottom frame: action buttons ──────────────────────────────────────
-        bot = ttk.Frame(self.root, padding=(p, 0, p, p))
-        bot.grid(row=2, column=0, sticky="ew")
+        # Manual scrolling turns autoscroll off until the end is reached again
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>", "<KeyRelease>"):
+            self._log_text.bind(seq, self._on_user_scroll, add="+")
+        self._log_text.vbar.bind("<ButtonRelease-1>", self._on_user_scroll, add="+")
 
-        self._run_btn = ttk.Button(
-            bot, text="▶  Run Conversion", command=self._run)
-        self._run_btn.pack(side="left")
-
-        ttk.Button(bot, text="Clear Log", command=self._clear_log).pack(
-            side="left", padx=(p, 0))
-        ttk.Button(bot, text="Quit", command=self.root.destroy).pack(
-            side="right")
-
-        self._status_var = tk.StringVar(value="Ready.")
-        ttk.Label(bot, textvariable=self._status_var).pack(
-            side="left", padx=(p * 2, 0))
+        # Lines logged while minimised are shown when the window comes back
+        self.root.bind("<Map>", self._flush_paused_buffer, add="+")
 
     # ─────────────────────────────────────────────────────────────────────────
     # Logger integration
     # ─────────────────────────────────────────────────────────────────────────
 
     def _connect_logger(self) -> None:
-        """Attach a queue handler so GUI can display log records."""
-        handler = _QueueHandler(self._log_queue)
-        handler.setFormatter(
-            logging.Formatter("%(asctime)s  %(levelname)-8s  %(message)s",
-                              datefmt="%H:%M:%S")
+        """
+        Attach a queue handler so GUI can display log records.
+
+        Records are picked up by a QueueListener thread which wakes the Tk
+        main loop only when something arrives (no periodic polling).
+        """
+        self._gui_handler = _QueueHandler(self._log_queue, self)
+        logging.getLogger("lroi").addHandler(self._gui_handler)
+
+        self._tk_sink = _TkSinkHandler(self, self._gui_handler)
+        self._tk_sink.setFormatter(
+            logging.Formatter(_GUI_LOG_FORMAT, datefmt="%H:%M:%S")
         )
-        logging.getLogger("lroi").addHandler(handler)
-        # Poll queue every 100 ms
-        self.root.after(100, self._poll_log_queue)
+        self._log_listener = _BlockingStopListener(
+            self._log_queue, self._tk_sink
+        )
+        self._log_listener.start()
 
-    def _poll_log_queue(self) -> None:
-        while True:
-            try:
-                msg = self._log_queue.get_nowait()
-            except queue.Empty:
-                break
-            self._append_log(msg)
-        self.root.after(100, self._poll_log_queue)
+    def _append_log(self, msg: str, level: str = "INFO") -> None:
+        self._append_batch([(level, msg)])
 
-    def _append_log(self, msg: str) -> None:
+    def _append_batch(self, msgs: List[Tuple[str, str]]) -> None:
+        """
+        Display ``(levelname, text)`` pairs, or hold them back while the log
+        display is paused or the window is not visible (e.g. minimised).
+        """
+        # Check the window, not the log widget: _insert_batch unmaps the
+        # widget during large bursts, and lines arriving before it is mapped
+        # again must not be diverted into the buffer
+        if self._log_paused.get() or not self.root.winfo_viewable():
+            buf = self._paused_buffer
+            self._paused_evicted += max(0, len(buf) + len(msgs) - buf.maxlen)
+            buf.extend(msgs)
+            return
+        if self._paused_buffer:
+            msgs = [*self._paused_buffer, *msgs]
+            self._paused_buffer.clear()
+        if self._paused_evicted:
+            msgs = [self._tk_sink.notice_line(
+                f"[{self._paused_evicted} earlier lines not shown]"), *msgs]
+            self._paused_evicted = 0
+        self._insert_batch(msgs)
+
+    def _flush_paused_buffer(self, event: Optional[tk.Event] = None) -> None:
+        """Show held-back lines once the log display is live again."""
+        if self._paused_buffer and hasattr(self, "_log_text"):
+            self._append_batch([])
+
+    def _insert_batch(self, msgs: List[Tuple[str, str]]) -> None:
+        """
+        Insert ``(levelname, text)`` pairs into the log widget.
+        """
+        # Large bursts: unmap the widget while inserting so Tk lays it out
+        # once on re-attach instead of re-flowing after every insert
+        detach = len(msgs) > self._DETACH_BATCH
+        if detach:
+            self._log_text.grid_remove()
         self._log_text.configure(state="normal")
-        # Pick colour tag based on level keyword in message
-        tag = "INFO"
-        for level in ("ERROR", "WARNING", "DEBUG"):
-            if level in msg:
-                tag = level
-                break
-        self._log_text.insert("end", msg + "\n", tag)
-        self._log_text.see("end")
+        # One insert for the whole batch: Text.insert takes alternating
+        # (chars, tags) pairs, so level changes need no extra Tcl calls
+        args: List[str] = []
+        for level, msg in msgs:
+            self._log_line_count += msg.count("\n") + 1
+            args.append(msg + "\n")
+            args.append(_LEVEL_TAG.get(level, "INFO"))
+        if args:
+            self._log_text.insert("end", *args)
+        # Keep the widget bounded: Text gets slower as it grows
+        overflow = self._log_line_count - self._MAX_LOG_LINES
+        if overflow > 0:
+            self._log_text.delete("1.0", f"{overflow + 1}.0")
+            self._log_line_count = self._MAX_LOG_LINES
         self._log_text.configure(state="disabled")
+        if detach:
+            self._log_text.grid()   # restores the remembered grid options
+        if self._autoscroll and not self._scroll_pending:
+            self._scroll_pending = True
+            self.root.after(self._SCROLL_MS, self._maybe_scroll)
+
+    def _maybe_scroll(self) -> None:
+        self._scroll_pending = False
+        if self._autoscroll:
+            self._log_text.see("end")
+
+    def _on_user_scroll(self, event: Optional[tk.Event] = None) -> None:
+        # Bindings fire before the widget scrolls; check once it has
+        self.root.after_idle(self._update_autoscroll)
+
+    def _update_autoscroll(self) -> None:
+        self._autoscroll = self._log_text.yview()[1] >= 1.0
 
     def _clear_log(self) -> None:
-        self._log_text.configure(state="normal")
-        self._log_text.delete("1.0", "end")
-        self._log_text.configure(state="disabled")
+        log_text = getattr(self, "_log_text", None)
+        if log_text is None:
+            return  # log panel not built yet (see _build_secondary_ui)
+        log_text.configure(state="normal")
+        log_text.delete("1.0", "end")
+        log_text.configure(state="disabled")
+        self._log_line_count = 0
+        self._paused_buffer.clear()
+        self._paused_evicted = 0
+        self._autoscroll = True
 
     # ─────────────────────────────────────────────────────────────────────────
     # File dialogs
     # ─────────────────────────────────────────────────────────────────────────
 
     def _browse_xls_files(self) -> None:
+        from tkinter import filedialog
         paths = filedialog.askopenfilenames(
             title="Select input XLS / XLSX file(s)",
             filetypes=[("Excel files", "*.xlsx *.xls"), ("All files", "*")],
         )
         if paths:
-            existing = self._xls_var.get().strip()
-            new_entries = list(paths)
-            combined = (existing + ";" if existing else "") + ";".join(new_entries)
-            self._xls_var.set(combined)
+            self._add_xls_entries(paths)
 
     def _browse_xls_folder(self) -> None:
+        from tkinter import filedialog
         folder = filedialog.askdirectory(title="Select folder containing XLS/XLSX files")
         if folder:
-            existing = self._xls_var.get().strip()
-            combined = (existing + ";" if existing else "") + folder
-            self._xls_var.set(combined)
+            self._add_xls_entries([folder])
+
+    def _add_xls_entries(self, entries) -> None:
+        """Append input files / folders to the selection."""
+        entries = [str(e) for e in entries]
+        self._xls_paths.extend(entries)
+        self._xls_listbox.insert("end", *entries)
+
+    def _clear_xls(self) -> None:
+        self._xls_paths.clear()
+        self._xls_listbox.delete(0, "end")
 
     def _browse_lut(self) -> None:
+        from tkinter import filedialog
         path = filedialog.askopenfilename(
             title="Select lookup table (LUT) Excel file",
             filetypes=[("Excel files", "*.xlsx *.xls"), ("All files", "*")],
@@ -321,6 +574,7 @@ class ConverterGUI:
 
 
     def _browse_log(self) -> None:
+        from tkinter import filedialog
         path = filedialog.asksaveasfilename(
             title="Save log file as",
             defaultextension=".log",
@@ -330,6 +584,7 @@ class ConverterGUI:
             self._log_var.set(path)
 
     def _browse_xlsx_log(self) -> None:
+        from tkinter import filedialog
         path = filedialog.asksaveasfilename(
             title="Save Excel log file as",
             defaultextension=".xlsx",
@@ -339,6 +594,7 @@ class ConverterGUI:
             self._xlsx_log_var.set(path)
 
     def _browse_config(self) -> None:
+        from tkinter import filedialog, messagebox
         path = filedialog.askopenfilename(
             title="Select config TOML file",
             filetypes=[("TOML files", "*.toml"), ("All files", "*")],
@@ -347,9 +603,8 @@ class ConverterGUI:
             self._config_var.set(path)
             # Reload config and update templates
             try:
-                import tomllib
-                with open(path, "rb") as f:
-                    self._config = tomllib.load(f)
+                from main import _load_config
+                self._config = _load_config(Path(path))
                 self._update_all_templates()
                 # Update hospital number from new config
                 hospital = self._config.get("defaults", {}).get("hospital", "")
@@ -383,23 +638,22 @@ class ConverterGUI:
 
     def _generate_timestamp(self) -> None:
         """Generate a timestamp to be used for all template resolutions."""
-        from datetime import datetime
-        self._timestamp = datetime.now()
+        self._timestamp = time.localtime()
+        # Resolved templates for this timestamp (template -> file name)
+        self._ts_resolved: Dict[str, str] = {}
     
     def _resolve_log_template(self, template: str) -> str:
         """Resolve placeholders in log file template using stored timestamp."""
         if not hasattr(self, '_timestamp'):
             self._generate_timestamp()
-        
-        return template.format(
-            yyyy=self._timestamp.strftime("%Y"),
-            mm=self._timestamp.strftime("%m"),
-            dd=self._timestamp.strftime("%d"),
-            HH=self._timestamp.strftime("%H"),
-            MM=self._timestamp.strftime("%M"),
-            SS=self._timestamp.strftime("%S"),
-            appname="lroi_converter"
-        )
+
+        resolved = self._ts_resolved.get(template)
+        if resolved is None:
+            from main import _template_to_strftime
+            fmt = _template_to_strftime(template, _APPNAME)
+            resolved = time.strftime(fmt, self._timestamp)
+            self._ts_resolved[template] = resolved
+        return resolved
 
     def _update_all_templates(self) -> None:
         """Update all template fields with same timestamp."""
@@ -453,6 +707,7 @@ class ConverterGUI:
     
     def _browse_output(self) -> None:
         """Browse for output XML file location."""
+        from tkinter import filedialog
         path = filedialog.asksaveasfilename(
             title="Save output XML as",
             defaultextension=".xml",
@@ -468,7 +723,7 @@ class ConverterGUI:
     def _apply_prepopulate(self) -> None:
         pp = self._prepopulate
         if "xls_paths" in pp:
-            self._xls_var.set(";".join(str(p) for p in pp["xls_paths"]))
+            self._add_xls_entries(pp["xls_paths"])
         if "lut_path" in pp and pp["lut_path"]:
             self._lut_var.set(str(pp["lut_path"]))
         
@@ -501,34 +756,20 @@ class ConverterGUI:
     # ─────────────────────────────────────────────────────────────────────────
 
     def _run(self) -> None:
-        if self._running:
-            return
+        from tkinter import messagebox
+        if self._job_queue.unfinished_tasks:
+            return  # a conversion is queued or running
 
-        xls_raw = self._xls_var.get().strip()
-        if not xls_raw:
+        raw_entries = list(self._xls_paths)
+        if not raw_entries:
             messagebox.showerror("Input required", "Please select at least one input XLS file or folder.")
             return
 
-        raw_entries = [p.strip() for p in xls_raw.split(";") if p.strip()]
-
-        # Reuse the same expansion logic as the CLI
-        from main import _expand_xls_inputs
-        xls_paths = [str(p) for p in _expand_xls_inputs(raw_entries)]
-
-        if not xls_paths:
-            messagebox.showerror(
-                "No files found",
-                "No .xlsx/.xls files were found at the specified paths.\n"
-                "Please check your selection.",
-            )
-            return
-        
         # Load config (user might have changed it via browse)
         config_path = self._config_var.get().strip()
         try:
-            import tomllib
-            with open(config_path, "rb") as f:
-                cfg = tomllib.load(f)
+            from main import _load_config
+            cfg = _load_config(Path(config_path))
         except Exception as e:
             messagebox.showerror("Config Error", f"Failed to load config from '{config_path}': {e}")
             return
@@ -564,33 +805,52 @@ class ConverterGUI:
             messagebox.showerror("Invalid input", f"Hospital number must be an integer, got: '{hospital_str}'")
             return
 
-        # Patch hospital into config
-        cfg.setdefault("defaults", {})["hospital"] = hospital
+        # Patch hospital into a copy of the (cached) config
+        cfg = {**cfg, "defaults": {**cfg.get("defaults", {}), "hospital": hospital}}
 
         self._run_btn.configure(state="disabled")
-        self._status_var.set("Running…")
-        self._running = True
+        self._status_var.set("Scanning inputs…")
 
-        thread = threading.Thread(
-            target=self._run_in_thread,
-            args=(xls_paths, lut_path, output_path, log_path, xlsx_log_path, cfg),
-            daemon=True,
-        )
-        thread.start()
+        self._job_queue.put(
+            (raw_entries, lut_path, output_path, log_path, xlsx_log_path, cfg))
+
+    def _worker_loop(self) -> None:
+        """Run queued conversion jobs (background thread, runs forever)."""
+        while True:
+            job = self._job_queue.get()
+            try:
+                self._run_in_thread(*job)
+            finally:
+                self._job_queue.task_done()
 
     def _run_in_thread(
         self,
-        xls_paths: List[str],
+        xls_entries: List[str],
         lut_path: Optional[str],
         output_path: Optional[str],
         log_path: Optional[str],
         xlsx_log_path: Optional[str],
         config: Dict[str, Any],
     ) -> None:
+        finish: Tuple[str, Optional[str], bool] = ("Error – see log.", None, True)
         try:
             # Deferred imports to keep GUI startup fast
             from logger import setup_logger
             from converter import convert
+            from main import _expand_xls_inputs
+
+            # Expand folders here, not on the Tk thread: scanning a network
+            # share can take a while (same expansion logic as the CLI)
+            xls_paths = [str(p) for p in _expand_xls_inputs(xls_entries)]
+            if not xls_paths:
+                finish = (
+                    "No files found.",
+                    "No .xlsx/.xls files were found at the specified paths.\n"
+                    "Please check your selection.",
+                    True,
+                )
+                return
+            self.root.after(0, self._status_var.set, "Running…")
 
             # Resolve "1" to actual template paths (like CLI does)
             if log_path == "1":
@@ -612,30 +872,18 @@ class ConverterGUI:
             loglevel_str = self._loglevel_var.get()
             log_level = getattr(logging, loglevel_str, logging.INFO)
             
-            logger = setup_logger(log_file=log_path, xlsx_file=xlsx_log_path, level=log_level)
+            max_repeats = config.get("defaults", {}).get("xlsx_log_max_repeats")
+            logger = setup_logger(
+                log_file=log_path,
+                xlsx_file=xlsx_log_path,
+                level=log_level,
+                xlsx_max_repeats=None if max_repeats is None else int(max_repeats),
+            )
 
             # Re-attach GUI queue handler after setup_logger (which clears handlers)
             # This ensures GUI receives all log messages during conversion
-            lroi_logger = logging.getLogger("lroi")
-            gui_handler = None
-            
-            # Find and preserve the GUI queue handler if it exists
-            for handler in lroi_logger.handlers[:]:
-                if isinstance(handler, _QueueHandler):
-                    gui_handler = handler
-                    break
-            
-            # If no GUI handler found, it was cleared by setup_logger - re-add it
-            if gui_handler is None:
-                gui_handler = _QueueHandler(self._log_queue)
-                gui_handler.setFormatter(
-                    logging.Formatter("%(asctime)s  %(levelname)-8s  %(message)s",
-                                    datefmt="%Y-%m-%d %H:%M:%S")
-                )
-            
-            # Ensure GUI handler is attached
-            if gui_handler not in lroi_logger.handlers:
-                lroi_logger.addHandler(gui_handler)
+            if self._gui_handler not in logger.handlers:
+                logger.addHandler(self._gui_handler)
 
             # LUT path (loading is handled by converter)
             lut_path_obj = Path(lut_path) if lut_path else None
@@ -652,23 +900,37 @@ class ConverterGUI:
                 f"{n_skip} rows skipped."
                 + (f"  Output: {output_path}" if output_path else "")
             )
-            self.root.after(0, lambda: self._status_var.set(msg))
-            if output_path:
-                self.root.after(0, lambda: messagebox.showinfo("Success", msg))
+            finish = (msg, msg if output_path else None, False)
 
         except Exception as exc:
             import traceback
             err = traceback.format_exc()
             logging.getLogger("lroi").error("Unexpected error:\n%s", err)
-            self.root.after(
-                0,
-                lambda: messagebox.showerror("Error", str(exc)),
-            )
-            self.root.after(0, lambda: self._status_var.set("Error – see log."))
+            finish = ("Error – see log.", str(exc), True)
 
         finally:
-            self.root.after(0, lambda: self._run_btn.configure(state="normal"))
-            self._running = False
+            # Finish this run's log files (the Excel log is written on close)
+            from logger import close_logger
+            close_logger()
+            # One marshalled update back to the Tk thread
+            self.root.after(0, self._finish, *finish)
+
+    def _finish(self, status: str, message: Optional[str] = None,
+                error: bool = False) -> None:
+        """Update the UI after a conversion run (Tk thread only)."""
+        from tkinter import messagebox
+        # A flood at the very end of a run has no later record to report it
+        self._tk_sink.flush_pending()
+        dropped = self._gui_handler.take_dropped()
+        if dropped:
+            self._append_batch([self._tk_sink.flood_line(dropped)])
+        self._status_var.set(status)
+        self._run_btn.configure(state="normal")
+        if message:
+            if error:
+                messagebox.showerror("Error", message)
+            else:
+                messagebox.showinfo("Success", message)
 
     # ─────────────────────────────────────────────────────────────────────────
     # Entry point
@@ -676,4 +938,12 @@ class ConverterGUI:
 
     def run(self) -> None:
         """Start the Tk main loop."""
-        self.root.mainloop()
+        # Pick up anything logged before the main loop was running
+        self.root.after_idle(self._tk_sink.flush_pending)
+        try:
+            self.root.mainloop()
+        finally:
+            logging.getLogger("lroi").removeHandler(self._gui_handler)
+            # The window is gone: drain the queue without touching Tk
+            self._tk_sink.closing = True
+            self._log_listener.stop()
@@ -13,22 +13,199 @@ rows. It opens directly in Excel with no delimiter or encoding issues.
 
 from __future__ import annotations
 
+import atexit
+import collections
 import logging
+import logging.handlers
 import os
+import queue
 import re
 import sys
-from datetime import datetime
+import zipfile
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
-
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.utils import get_column_letter
+from typing import Any, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
 
 
 _LOG_FORMAT = "%(asctime)s  %(levelname)-8s  %(message)s"
 _DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+# Write buffer of the text log file (ERROR records flush it at once)
+_FILE_BUFFER_SIZE = 64 * 1024
+
+# Logger names whose close_logger() is registered to run at exit
+_ATEXIT_REGISTERED: set = set()
+
+# Matches "admission_id=123", "Admission ID: 123", "admission_id '123'" etc.
+_ADMISSION_ID_RE = re.compile(r"admission[_ ]id[=:]?\s*['\"]?(\w+)", re.IGNORECASE)
+
+
+class _BufferedFileHandler(logging.FileHandler):
+    """
+    FileHandler that writes through a large buffer and only flushes on
+    ERROR records and on close, instead of after every record.
+    """
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=_FILE_BUFFER_SIZE,
+                    encoding=self.encoding, errors=self.errors)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.stream is None:
+            if self.mode != "w" or not getattr(self, "_closed", False):
+                self.stream = self._open()
+            if self.stream is None:
+                return
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.ERROR:
+                self.stream.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class DedupingFilter(logging.Filter):
+    """
+    Let at most *max_repeats* records through per message template.
+
+    Records are counted by ``record.msg`` (the format string), so
+    "Row %d validated OK" is one template however many rows there are.
+    WARNING and above always pass.  The Excel log handler adds a summary
+    row per throttled template when it is closed.
+    """
+
+    def __init__(self, max_repeats: int) -> None:
+        super().__init__()
+        self.max_repeats = max_repeats
+        self._counts: collections.Counter = collections.Counter()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        # The queue handler has already merged args into msg; it keeps the
+        # original format string as record.template
+        key = (record.levelname, str(getattr(record, "template", record.msg)))
+        self._counts[key] += 1
+        return self._counts[key] <= self.max_repeats
+
+    def suppressed(self) -> List[Tuple[str, str, int]]:
+        """Return (levelname, template, number dropped) per throttled template."""
+        return [
+            (levelname, msg, count - self.max_repeats)
+            for (levelname, msg), count in self._counts.items()
+            if count > self.max_repeats
+        ]
+
+
+class _TemplateQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps the format string (msg) as record.template.
+
+    Also used by the converter's worker processes; records forwarded from
+    a worker arrive with msg already merged but template still set.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        template = getattr(record, "template", record.msg)
+        record = super().prepare(record)
+        record.template = template
+        return record
+
+
+# Static parts of the .xlsx package written by _XLSXHandler
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+    ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Log" sheetId="1" r:id="rId1"/></sheets>'
+    '<definedNames><definedName name="_xlnm._FilterDatabase" localSheetId="0" hidden="1">'
+    "'Log'!$A$1:$D${last_row}</definedName></definedNames>"
+    '</workbook>'
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+# Cell formats (s="n" in the sheet): 0 plain, 1 date, 2 header,
+# 3/4 ERROR text/date, 5/6 WARNING text/date
+_XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd h:mm:ss"/></numFmts>'
+    '<fonts count="4">'
+    '<font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><color rgb="00CC0000"/><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><color rgb="00FF8800"/><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '</fonts>'
+    '<fills count="5">'
+    '<fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="00D3D3D3"/><bgColor rgb="00D3D3D3"/></patternFill></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="00FFE6E6"/><bgColor rgb="00FFE6E6"/></patternFill></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="00FFF4E6"/><bgColor rgb="00FFF4E6"/></patternFill></fill>'
+    '</fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="7">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="2" fillId="3" borderId="0" xfId="0" applyFont="1" applyFill="1"/>'
+    '<xf numFmtId="164" fontId="2" fillId="3" borderId="0" xfId="0" applyNumberFormat="1" applyFont="1" applyFill="1"/>'
+    '<xf numFmtId="0" fontId="3" fillId="4" borderId="0" xfId="0" applyFont="1" applyFill="1"/>'
+    '<xf numFmtId="164" fontId="3" fillId="4" borderId="0" xfId="0" applyNumberFormat="1" applyFont="1" applyFill="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+# Start of sheet1.xml: frozen header row and column widths
+_XLSX_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0">'
+    '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+    '<selection pane="bottomLeft" activeCell="A2" sqref="A2"/>'
+    '</sheetView></sheetViews>'
+    '<cols>'
+    '<col min="1" max="1" width="20" customWidth="1"/>'   # Timestamp
+    '<col min="2" max="2" width="10" customWidth="1"/>'   # Level
+    '<col min="3" max="3" width="15" customWidth="1"/>'   # Admission ID
+    '<col min="4" max="4" width="100" customWidth="1"/>'  # Message
+    '</cols>'
+    '<sheetData>'
+)
+
+# Excel stores dates as days since 1899-12-30
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+_ONE_DAY = timedelta(days=1)
+
+# Characters XML 1.0 cannot represent at all
+_XML_ILLEGAL_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
 
 class _XLSXHandler(logging.Handler):
     """
@@ -42,86 +219,76 @@ class _XLSXHandler(logging.Handler):
     - Proper column widths
     - Admission ID extraction into dedicated column
 
-    The file is written in append mode, so logs are preserved even if the
-    process crashes.
+    The sheet XML is written directly: each record becomes one <row> of
+    inline strings appended to a temporary file next to the .xlsx, and
+    close() zips it with the fixed workbook parts into the final file.
+    This keeps openpyxl's per-cell objects out of long runs entirely.
     """
 
+    # Class attributes so subclasses can override the extraction
+    _ADMISSION_ID_RE = _ADMISSION_ID_RE
+    # Cheap substring prefilter (admission / Admission / ADMISSION); most
+    # records never mention an admission ID, so the regex is skipped
+    _ADMISSION_HINTS = ("dmission", "DMISSION")
+
+    _HEADERS = ("Timestamp", "Level", "Admission ID", "Message")
+
+    # levelno -> (text style, date style) indices into _XLSX_STYLES;
+    # other levels use the plain styles 0 / 1
+    _LEVEL_STYLES: Dict[int, Tuple[int, int]] = {
+        logging.ERROR:   (3, 4),
+        logging.WARNING: (5, 6),
+    }
+    _HEADER_STYLE = 2
+
     def __init__(self, xlsx_path: Path) -> None:
         super().__init__()
         self._xlsx_path = xlsx_path
         self._xlsx_path.parent.mkdir(parents=True, exist_ok=True)
+        self._sheet_path = xlsx_path.with_name(xlsx_path.name + ".sheet1.xml")
+        self._sheet = open(self._sheet_path, "w", encoding="utf-8")
+        self._sheet.write(_XLSX_SHEET_HEAD)
         self._row_number = 1
-        
-        # Create workbook and worksheet
-        self._wb = openpyxl.Workbook()
-        self._ws = self._wb.active
-        self._ws.title = "Log"
-        
-        # Write header row with formatting
-        headers = ["Timestamp", "Level", "Admission ID", "Message"]
-        self._ws.append(headers)
-        
-        # Format header row: bold, centered, light gray background
-        header_fill = PatternFill(start_color="D3D3D3", end_color="D3D3D3", fill_type="solid")
-        header_font = Font(bold=True)
-        for col_num, header in enumerate(headers, 1):
-            cell = self._ws.cell(row=1, column=col_num)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-        
-        # Set column widths
-        self._ws.column_dimensions["A"].width = 20  # Timestamp
-        self._ws.column_dimensions["B"].width = 10  # Level
-        self._ws.column_dimensions["C"].width = 15  # Admission ID
-        self._ws.column_dimensions["D"].width = 100 # Message
-        
-        # Freeze header row
-        self._ws.freeze_panes = "A2"
-        
-        # Enable auto-filter
-        self._ws.auto_filter.ref = f"A1:D1"
-        
-        # Save initial file
-        self._wb.save(self._xlsx_path)
-        self._row_number = 2
+
+        # Write header row
+        self._write_row([
+            self._text_cell(column, header, self._HEADER_STYLE)
+            for column, header in zip("ABCD", self._HEADERS)
+        ])
+
+    def _text_cell(self, column: str, value: str, style: int) -> str:
+        """Return an inline-string <c> element (no value: style only)."""
+        s = f' s="{style}"' if style else ""
+        if not value:
+            return f'<c r="{column}{self._row_number}"{s}/>' if style else ""
+        value = escape(_XML_ILLEGAL_RE.sub("", value))
+        return (f'<c r="{column}{self._row_number}" t="inlineStr"{s}>'
+                f'<is><t xml:space="preserve">{value}</t></is></c>')
+
+    def _write_row(self, cells) -> None:
+        self._sheet.write(f'<row r="{self._row_number}">{"".join(cells)}</row>')
+        self._row_number += 1
 
     def emit(self, record: logging.LogRecord) -> None:
+        if self._sheet is None:
+            return  # already saved and closed
         try:
             timestamp = self._format_timestamp(record)
             level = record.levelname
             message = record.getMessage()
             admission_id = self._extract_admission_id(message)
-            
-            # Append row
-            row = [timestamp, level, admission_id, message]
-            self._ws.append(row)
-            
-            # Apply formatting based on level
-            if level == "ERROR":
-                fill = PatternFill(start_color="FFE6E6", end_color="FFE6E6", fill_type="solid")
-                font = Font(color="CC0000", bold=True)
-            elif level == "WARNING":
-                fill = PatternFill(start_color="FFF4E6", end_color="FFF4E6", fill_type="solid")
-                font = Font(color="FF8800")
-            else:
-                fill = None
-                font = None
-            
-            if fill or font:
-                for col_num in range(1, 5):
-                    cell = self._ws.cell(row=self._row_number, column=col_num)
-                    if fill:
-                        cell.fill = fill
-                    if font:
-                        cell.font = font
-            
-            self._row_number += 1
-            
-            # Save file (with optimization: only save every 10 records to reduce I/O)
-            if self._row_number % 10 == 0:
-                self._wb.save(self._xlsx_path)
-                
+
+            # Row formatted based on level (only WARNING/ERROR rows are
+            # highlighted)
+            text_style, date_style = self._LEVEL_STYLES.get(record.levelno, (0, 1))
+            serial = (timestamp - _EXCEL_EPOCH) / _ONE_DAY
+            self._write_row((
+                f'<c r="A{self._row_number}" s="{date_style}"><v>{serial!r}</v></c>',
+                self._text_cell("B", level, text_style),
+                self._text_cell("C", admission_id, text_style),
+                self._text_cell("D", message, text_style),
+            ))
+
         except Exception:
             self.handleError(record)
 
@@ -131,27 +298,53 @@ class _XLSXHandler(logging.Handler):
 
     def _extract_admission_id(self, message: str) -> str:
         """Extract admission_id from log message if present."""
-        patterns = [
-            r"admission_id[=:]?\s*['\"]?(\w+)",
-            r"Admission ID[=:]?\s*['\"]?(\w+)",
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, message, re.IGNORECASE)
-            if match:
-                return match.group(1)
-        return ""
+        if not any(hint in message for hint in self._ADMISSION_HINTS):
+            return ""
+        match = self._ADMISSION_ID_RE.search(message)
+        return match.group(1) if match else ""
 
     def close(self) -> None:
-        """Save and close the workbook."""
-        if hasattr(self, "_wb") and self._wb:
+        """Finish the sheet and write the .xlsx file."""
+        if getattr(self, "_sheet", None) is not None:
+            # Summarise what a DedupingFilter held back
+            for f in self.filters:
+                if isinstance(f, DedupingFilter):
+                    for levelname, msg, count in f.suppressed():
+                        self.emit(logging.makeLogRecord({
+                            "levelname": levelname,
+                            "levelno": logging.getLevelName(levelname),
+                            "msg": "[%d similar records suppressed] %s",
+                            "args": (count, msg),
+                        }))
+            sheet, self._sheet = self._sheet, None
             try:
-                # Final save with updated auto-filter range
-                max_row = self._ws.max_row
-                self._ws.auto_filter.ref = f"A1:D{max_row}"
-                self._wb.save(self._xlsx_path)
-                self._wb.close()
-            except Exception:
-                pass
+                # Auto-filter covering all rows
+                last_row = self._row_number - 1
+                with sheet:
+                    sheet.write(
+                        f'</sheetData><autoFilter ref="A1:D{last_row}"/></worksheet>'
+                    )
+                with zipfile.ZipFile(self._xlsx_path, "w", zipfile.ZIP_DEFLATED) as zf:
+                    zf.writestr("[Content_Types].xml", _XLSX_CONTENT_TYPES)
+                    zf.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+                    zf.writestr("xl/workbook.xml",
+                                _XLSX_WORKBOOK.replace("{last_row}", str(last_row)))
+                    zf.writestr("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS)
+                    zf.writestr("xl/styles.xml", _XLSX_STYLES)
+                    zf.write(self._sheet_path, "xl/worksheets/sheet1.xml")
+            except Exception as exc:
+                # Keep the rows: the temporary sheet is only removed once the
+                # .xlsx exists (e.g. Excel may still hold the old log open)
+                print(
+                    f"ERROR: Could not write Excel log {self._xlsx_path}: {exc}\n"
+                    f"       Log rows kept in: {self._sheet_path}",
+                    file=sys.stderr,
+                )
+            else:
+                try:
+                    os.remove(self._sheet_path)
+                except OSError:
+                    pass
         super().close()
 
 
@@ -160,6 +353,7 @@ def setup_logger(
     xlsx_file: Optional[str | Path] = None,
     level: int = logging.DEBUG,
     name: str = "lroi",
+    xlsx_max_repeats: Optional[int] = None,
 ) -> logging.Logger:
     """
     Configure and return the application logger.
@@ -176,6 +370,9 @@ def setup_logger(
         can apply their own level filter).
     name:
         Logger name (defaults to ``"lroi"``).
+    xlsx_max_repeats:
+        Write at most this many DEBUG/INFO records per message template to
+        the Excel log (see DedupingFilter).  ``None`` keeps every record.
 
     Returns
     -------
@@ -184,7 +381,9 @@ def setup_logger(
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
-    # Avoid duplicate handlers when called more than once (e.g. unit tests)
+    # Avoid duplicate handlers when called more than once (e.g. unit tests,
+    # or one GUI run after another); finish the previous log files first
+    close_logger(name)
     if logger.handlers:
         logger.handlers.clear()
 
@@ -196,28 +395,79 @@ def setup_logger(
     console_handler.setFormatter(formatter)
     logger.addHandler(console_handler)
 
+    # File and Excel output is written by a QueueListener thread, so logging
+    # calls in the conversion loop never wait for disk or the Excel writer
+    slow_handlers = []
+    messages = []
+
     # ── File handler (optional) ───────────────────────────────────────────────
     if log_file is not None:
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
-        file_handler = logging.FileHandler(log_path, encoding="utf-8")
+        file_handler = _BufferedFileHandler(log_path, encoding="utf-8")
         file_handler.setLevel(level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-        logger.info("Log file: %s", log_path.resolve())
+        slow_handlers.append(file_handler)
+        messages.append(("Log file: %s", log_path.resolve()))
 
     # ── Excel handler (optional, for healthcare users) ────────────────────────
     if xlsx_file is not None:
         xlsx_path = Path(xlsx_file)
         xlsx_handler = _XLSXHandler(xlsx_path)
         xlsx_handler.setLevel(level)
-        logger.addHandler(xlsx_handler)
-        logger.info("Excel log file: %s (double-click to open in Excel)", 
-                   xlsx_path.resolve())
+        if xlsx_max_repeats is not None:
+            xlsx_handler.addFilter(DedupingFilter(xlsx_max_repeats))
+        slow_handlers.append(xlsx_handler)
+        messages.append(("Excel log file: %s (double-click to open in Excel)",
+                         xlsx_path.resolve()))
+
+    if slow_handlers:
+        log_queue: queue.Queue = queue.Queue(-1)
+        queue_handler = _TemplateQueueHandler(log_queue)
+        logger.addHandler(queue_handler)
+        listener = logging.handlers.QueueListener(
+            log_queue, *slow_handlers, respect_handler_level=True
+        )
+        listener.start()
+        logger._lroi_listener = listener            # type: ignore[attr-defined]
+        logger._lroi_queue_handler = queue_handler  # type: ignore[attr-defined]
+        if name not in _ATEXIT_REGISTERED:
+            atexit.register(close_logger, name)
+            _ATEXIT_REGISTERED.add(name)
+
+    for msg, path in messages:
+        logger.info(msg, path)
 
     return logger
 
 
+def close_logger(name: str = "lroi") -> None:
+    """
+    Flush and close the file / Excel log outputs set up by setup_logger.
+
+    The Excel log is only written to disk here, so call this when a run is
+    finished (it also runs automatically at interpreter exit).  The console
+    handler and any handlers added by others are left in place.
+    """
+    logger = logging.getLogger(name)
+    listener = getattr(logger, "_lroi_listener", None)
+    if listener is None:
+        return
+    logger.removeHandler(logger._lroi_queue_handler)  # type: ignore[attr-defined]
+    listener.stop()  # processes everything still queued
+    for handler in listener.handlers:
+        handler.close()
+    logger._lroi_listener = None  # type: ignore[attr-defined]
+
+
+def make_queue_handler(log_queue: Any) -> logging.Handler:
+    """
+    Return a handler that forwards records to *log_queue*, keeping each
+    record's format string so DedupingFilter still matches repeats.
+    """
+    return _TemplateQueueHandler(log_queue)
+
+
 def get_logger(name: str = "lroi") -> logging.Logger:
     """Return the already-configured logger (or a fresh unconfigured one)."""
     return logging.getLogger(name)
@@ -30,17 +30,23 @@ from __future__ import annotations
 
 import argparse
 import datetime
+import functools
 import logging
 import os
+import re
 import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
 
 # ── Constants ──────────────────────────────────────────────────────────────────
 GUI_FLAG = '--gui'  # Used in multiple places - define once
 
+# Matched against the lowercased file name, so any case is accepted
+_XLS_SUFFIXES = (".xlsx", ".xls")
+
 # ── Locate config.toml relative to executable (handles PyInstaller) ────────────
 
+@functools.cache
 def _get_application_dir() -> Path:
     """
     Get the directory where the application is located.
@@ -68,17 +74,23 @@ except ModuleNotFoundError:
         tomllib = None  # type: ignore[assignment]
 
 
+@functools.lru_cache(maxsize=8)
+def _load_config_cached(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse the TOML file at *path*; *mtime_ns* only keys the cache."""
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
 def _load_config(config_path: Path) -> Dict[str, Any]:
-    """Parse config.toml and return as nested dict."""
+    """
+    Parse config.toml and return as nested dict.
+
+    The result is cached until the file changes, so callers must not
+    mutate it.
+    """
     if tomllib is None:
-        # Fall back to a minimal hand-rolled TOML reader isn't practical;
-        # inform the user clearly.
-        try:
-            import tomli as tomllib2  # type: ignore
-            with open(config_path, "rb") as f:
-                return tomllib2.load(f)
-        except ImportError:
-            pass
+        # Both tomllib and tomli failed to import above; a hand-rolled TOML
+        # reader isn't practical, so inform the user clearly.
         print(
             "ERROR: No TOML parser available.  Install one:\n"
             "  pip install tomli          (Python < 3.11)\n"
@@ -87,8 +99,7 @@ def _load_config(config_path: Path) -> Dict[str, Any]:
         )
         sys.exit(1)
 
-    with open(config_path, "rb") as f:
-        return tomllib.load(f)
+    return _load_config_cached(str(config_path), config_path.stat().st_mtime_ns)
 
 
 def _expand_xls_inputs(raw_inputs: List[str]) -> List[Path]:
@@ -102,37 +113,36 @@ def _expand_xls_inputs(raw_inputs: List[str]) -> List[Path]:
       the converter can emit a clear error for bad files rather than silently
       skipping them).
     - A path that is a folder → recursively collect every *.xlsx / *.xls file
-      within it, sorted alphabetically.
+      within it (any case, skipping Excel "~$" lock files).
     - Duplicates (e.g. a file listed twice, or a file inside a folder that was
-      also listed explicitly) are removed while preserving order.
+      also listed explicitly) are removed, and the result is sorted once.
     """
-    seen:   set   = set()
-    result: List[Path] = []
+    all_paths: Set[Path] = set()
 
     for raw in raw_inputs:
         p = Path(raw).expanduser().resolve()
         if p.is_dir():
-            files = sorted(
-                f for f in p.rglob("*")
-                if f.suffix.lower() in {".xlsx", ".xls"} and f.is_file()
-            )
-            if not files:
+            # Filter on the plain file names from os.walk; only matches are
+            # wrapped in a Path and nothing is stat'ed again
+            found = False
+            for dirpath, _dirnames, filenames in os.walk(p):
+                for name in filenames:
+                    if name.lower().endswith(_XLS_SUFFIXES) and not name.startswith("~$"):
+                        all_paths.add(Path(dirpath, name))
+                        found = True
+            if not found:
                 print(f"WARNING: No .xlsx/.xls files found in folder: {p}", file=sys.stderr)
-            for f in files:
-                if f not in seen:
-                    seen.add(f)
-                    result.append(f)
         elif p.is_file():
-            if p not in seen:
-                seen.add(p)
-                result.append(p)
+            all_paths.add(p)
         else:
             print(f"WARNING: Path not found, skipping: {p}", file=sys.stderr)
 
-    return result
+    return sorted(all_paths)
 
 
-def _resolve_log_path(log_arg: str, config: Dict[str, Any]) -> Optional[str]:
+def _resolve_log_path(
+    log_arg: str, config: Dict[str, Any], now: Optional[datetime.datetime] = None
+) -> Optional[str]:
     """
     Resolve the --log argument to a file path (or None for console-only).
 
@@ -146,11 +156,13 @@ def _resolve_log_path(log_arg: str, config: Dict[str, Any]) -> Optional[str]:
             config.get("defaults", {})
             .get("log_file_template", "{yyyy}-{mm}-{dd}_{appname}.log")
         )
-        return _expand_template(template)
+        return _expand_template(template, now)
     return log_arg
 
 
-def _resolve_xlsx_log_path(log_arg: str, config: Dict[str, Any]) -> Optional[str]:
+def _resolve_xlsx_log_path(
+    log_arg: str, config: Dict[str, Any], now: Optional[datetime.datetime] = None
+) -> Optional[str]:
     """
     Resolve the Excel log path from config template.
 
@@ -168,11 +180,13 @@ def _resolve_xlsx_log_path(log_arg: str, config: Dict[str, Any]) -> Optional[str
     if not template or not template.strip():
         return None
     
-    return _expand_template(template)
+    return _expand_template(template, now)
 
 
 def _resolve_output_path(
-    output_arg: Optional[str], config: Dict[str, Any]
+    output_arg: Optional[str],
+    config: Dict[str, Any],
+    now: Optional[datetime.datetime] = None,
 ) -> Optional[str]:
     """Resolve the output XML path, applying template if not given."""
     if output_arg:
@@ -182,23 +196,44 @@ def _resolve_output_path(
         .get("xml_file_template", "{yyyy}-{mm}-{dd}_{appname}_output.xml")
     )
     out_dir = config.get("defaults", {}).get("output_dir", ".")
-    return str(Path(out_dir) / _expand_template(template))
-
-
-def _expand_template(template: str) -> str:
-    """Replace datetime and appname placeholders in *template*."""
-    now  = datetime.datetime.now()
-    name = Path(sys.argv[0]).stem
-    return (
-        template
-        .replace("{yyyy}",    now.strftime("%Y"))
-        .replace("{mm}",      now.strftime("%m"))
-        .replace("{dd}",      now.strftime("%d"))
-        .replace("{HH}",      now.strftime("%H"))
-        .replace("{MM}",      now.strftime("%M"))
-        .replace("{SS}",      now.strftime("%S"))
-        .replace("{appname}", name)
-    )
+    return str(Path(out_dir) / _expand_template(template, now))
+
+
+def _expand_template(template: str, now: Optional[datetime.datetime] = None) -> str:
+    """
+    Replace datetime and appname placeholders in *template*.
+
+    Pass the same *now* for all templates of one run so the .log, .xlsx and
+    output names carry the same timestamp.
+    """
+    if now is None:
+        now = datetime.datetime.now().replace(microsecond=0)
+    return now.strftime(_template_to_strftime(template))
+
+
+# Template placeholder → strftime directive ({appname} is filled in per call)
+_TEMPLATE_CODES = {
+    "yyyy": "%Y",
+    "mm":   "%m",
+    "dd":   "%d",
+    "HH":   "%H",
+    "MM":   "%M",
+    "SS":   "%S",
+}
+_TEMPLATE_RE = re.compile(r"\{(yyyy|mm|dd|HH|MM|SS|appname)\}")
+
+
+@functools.lru_cache(maxsize=32)
+def _template_to_strftime(template: str, appname: Optional[str] = None) -> str:
+    """
+    Translate a file name template (``{yyyy}-{mm}-{dd}_{appname}.log``) into
+    a strftime format, once per template, so resolving it is one strftime
+    call.  *appname* defaults to the name of the running script.
+    """
+    if appname is None:
+        appname = Path(sys.argv[0]).stem
+    codes = dict(_TEMPLATE_CODES, appname=appname.replace("%", "%%"))
+    return _TEMPLATE_RE.sub(lambda m: codes[m.group(1)], template.replace("%", "%%"))
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -336,12 +371,15 @@ def main(argv: Optional[List[str]] = None) -> int:
 
     # Apply CLI hospital override
     if args.hospital is not None:
-        config.setdefault("defaults", {})["hospital"] = args.hospital
+        # Copy instead of updating in place: the loaded config is cached
+        config = {**config, "defaults": {**config.get("defaults", {}), "hospital": args.hospital}}
 
     # ── Resolve paths ─────────────────────────────────────────────────────────
-    log_path     = _resolve_log_path(args.log, config)
-    xlsx_log_path = _resolve_xlsx_log_path(args.log, config)
-    output_path  = _resolve_output_path(args.output, config)
+    # One timestamp for every templated file name of this run
+    now = datetime.datetime.now().replace(microsecond=0)
+    log_path     = _resolve_log_path(args.log, config, now)
+    xlsx_log_path = _resolve_xlsx_log_path(args.log, config, now)
+    output_path  = _resolve_output_path(args.output, config, now)
     raw_xls: List[str] = args.xls or []
     xls_paths = _expand_xls_inputs(raw_xls)
 
@@ -379,7 +417,13 @@ def main(argv: Optional[List[str]] = None) -> int:
     
     # Convert loglevel string to logging constant
     log_level = getattr(logging, args.loglevel, logging.INFO)
-    logger = setup_logger(log_file=log_path, xlsx_file=xlsx_log_path, level=log_level)
+    max_repeats = config.get("defaults", {}).get("xlsx_log_max_repeats")
+    logger = setup_logger(
+        log_file=log_path,
+        xlsx_file=xlsx_log_path,
+        level=log_level,
+        xlsx_max_repeats=None if max_repeats is None else int(max_repeats),
+    )
 
     logger.info("LROI PROMs Converter starting")
     logger.info("Config: %s", config_path)
@@ -408,4 +452,7 @@ def main(argv: Optional[List[str]] = None) -> int:
 
 
 if __name__ == "__main__":
+    # Required for converter worker processes in PyInstaller builds
+    import multiprocessing
+    multiprocessing.freeze_support()
     sys.exit(main())
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+test_converter.py - Behavioural tests for the conversion pipeline
+
+Input workbooks are generated in a temporary folder, so the tests do not
+depend on the demo files.
+
+Usage:
+    python test_converter.py
+
+Author: LROI Converter v1.4.9
+"""
+
+import contextlib
+import datetime
+import io
+import logging
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+import openpyxl
+
+import converter
+import logger
+import main
+import validate_xml
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test Data
+# ──────────────────────────────────────────────────────────────────────────────
+
+OKS_HEADER = ["RecordNumber", "Patient ID", "Survey Date", "Follow-up Phase",
+              *(f"Q{i}" for i in range(1, 13))]
+
+TEST_CONFIG: Dict[str, Any] = {
+    "defaults": {"hospital": 1234, "lut_column_prefix": "__LUT__"},
+    "lut": {"join_column": "PatientRecordID"},
+    "PROM": {
+        "OKS": {
+            "detection_column": "RecordNumber",
+            "lookup": {
+                "required": True,
+                "join_column": "RecordNumber",
+                "add_columns": ["Gender", "Date of Birth", "Laterality"],
+            },
+            "UPNNUM": {"column": "Patient ID"},
+            "DATUMINVUL": {"column": "Survey Date"},
+            "GENDER": {
+                "column": "__LUT__Gender",
+                "value": [
+                    {"match": "^M(ale)?$", "replace": "0"},
+                    {"match": "^F(emale)?$", "replace": "1"},
+                ],
+            },
+            "DATBIRTH": {"column": "__LUT__Date of Birth"},
+            "FUPK": {
+                "column": "Follow-up Phase",
+                "value": [
+                    {"match": "Pre-?Op", "replace": "-1"},
+                    {"match": "3\\s*Month|3M", "replace": "3"},
+                ],
+            },
+            "SIDEPK": {
+                "column": "__LUT__Laterality",
+                "value": [
+                    {"match": "Right|R", "replace": "1"},
+                    {"match": "Left|L", "replace": "2"},
+                ],
+            },
+            **{f"OKS{i}PK": {"column": f"Q{i}"} for i in range(1, 13)},
+        },
+    },
+}
+
+
+def _write_xlsx(path: Path, rows: List[List[Any]]) -> Path:
+    """Save *rows* as the first sheet of a new workbook."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return path
+
+
+def _make_fixtures(folder: Path, n_files: int = 3, n_rows: int = 5) -> Dict[str, Any]:
+    """Write n_files OKS exports plus a matching LUT into *folder*."""
+    inputs = []
+    lut_rows: List[List[Any]] = [["PatientRecordID", "Gender", "Date of Birth", "Laterality"]]
+    for f in range(n_files):
+        rows: List[List[Any]] = [OKS_HEADER]
+        for i in range(n_rows):
+            record = f"R{f}-{i}"
+            rows.append([record, f"P{f}{i:03d}", datetime.datetime(2024, 6, i + 1),
+                         ["Pre-Op", "3 Month"][i % 2], *((i + q) % 5 for q in range(12))])
+            lut_rows.append([record, ["Male", "F"][i % 2], datetime.datetime(1950, 1, i + 1),
+                             ["Right", "L"][i % 2]])
+        inputs.append(_write_xlsx(folder / f"oks_{f}.xlsx", rows))
+    lut = _write_xlsx(folder / "lut.xlsx", lut_rows)
+    return {"inputs": inputs, "lut": lut}
+
+
+def _config(**defaults: Any) -> Dict[str, Any]:
+    """TEST_CONFIG with extra [defaults] settings."""
+    return dict(TEST_CONFIG, defaults=dict(TEST_CONFIG["defaults"], **defaults))
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Test Result Storage
+# ──────────────────────────────────────────────────────────────────────────────
+
+all_test_results: List[Dict[str, Any]] = []
+
+def check(description: str, condition: bool, detail: Any = "") -> bool:
+    """Record one check result."""
+    all_test_results.append(
+        {"description": description, "passed": bool(condition), "detail": detail}
+    )
+    # Under pytest, a failed check fails the test function
+    if "pytest" in sys.modules:
+        assert condition, f"{description}: {detail}"
+    return bool(condition)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Conversion Tests
+# ──────────────────────────────────────────────────────────────────────────────
+
+def test_parallel_matches_serial(tmp_path: Path):
+    """Parallel conversion writes the same bytes as serial conversion."""
+    print("Testing convert() with workers=1 and workers=2...")
+
+    fx = _make_fixtures(tmp_path)
+    serial_out = tmp_path / "serial.xml"
+    parallel_out = tmp_path / "parallel.xml"
+
+    xml, n_conv, n_skip = converter.convert(
+        fx["inputs"], _config(workers=1), fx["lut"], serial_out)
+    check("convert() with output_path returns None for the XML", xml is None, xml)
+    check("all rows converted", (n_conv, n_skip) == (15, 0), (n_conv, n_skip))
+
+    calls = []
+    run_parallel = converter._process_files_parallel
+    converter._process_files_parallel = lambda *a: calls.append(a) or run_parallel(*a)
+    try:
+        converter.convert(fx["inputs"], _config(workers=2), fx["lut"], parallel_out)
+    finally:
+        converter._process_files_parallel = run_parallel
+    check("workers=2 uses the process pool", len(calls) == 1, calls)
+    check("parallel output is byte-identical to serial output",
+          serial_out.read_bytes() == parallel_out.read_bytes())
+
+    xml, _, _ = converter.convert(fx["inputs"], _config(workers=1), fx["lut"])
+    check("in-memory XML matches the written file",
+          xml == serial_out.read_text(encoding="utf-8"))
+
+def test_extraction_plan():
+    """build_extraction_plan / extract_with_plan."""
+    print("Testing build_extraction_plan / extract_with_plan...")
+
+    prom_config = {
+        "detection_column": "RecordNumber",
+        "lookup": {"required": True},
+        "NOTES": "not a table",
+        "NOCOLUMN": {"value": []},
+        "GENDER": TEST_CONFIG["PROM"]["OKS"]["GENDER"],
+        "DATUMINVUL": {"column": "Survey Date"},
+        "FUPK": {
+            "__phase": "$IF($GT(%(Score),10),hi,lo)",
+            "__note": "literal",
+            "column": "%(__phase)\n    ",
+        },
+        "SIDEPK": {"column": "Side", "value": [{"match": "^[12]$"}]},
+        "OKS1PK": {"column": "Q1 Pain"},
+    }
+    plan = converter.build_extraction_plan(prom_config)
+    check("plan skips meta fields, non-tables and entries without a column",
+          [p[0] for p in plan] == ["GENDER", "DATUMINVUL", "FUPK", "SIDEPK", "OKS1PK"],
+          [p[0] for p in plan])
+    fupk = plan[2]
+    check("virtual columns kept in order, flagged magic or literal",
+          fupk[1] == [("__phase", "$IF($GT(%(Score),10),hi,lo)", True),
+                      ("__note", "literal", False)], fupk[1])
+    check("magic column spec is normalised once", fupk[2:4] == ("%(__phase)\n", True),
+          fupk[2:4])
+    check("conversions are compiled into the plan",
+          [(rx.pattern, rep) for rx, rep in plan[0][4]]
+          == [("^M(ale)?$", "0"), ("^F(emale)?$", "1")])
+
+    row = {"Sex": "x", "__LUT__Gender": "Female",
+           "Survey Date": datetime.datetime(2024, 3, 5, 10, 30),
+           "Score": 12, "Side": "3", "Q1 Pain": None}
+    snapshot = dict(row)
+    elements = converter.extract_with_plan(row, plan)
+    check("extract_with_plan converts, formats dates and runs magic columns",
+          elements == {"GENDER": "1", "DATUMINVUL": "2024-03-05", "FUPK": "hi"},
+          elements)
+    check("extract_with_plan leaves the row unchanged", row == snapshot)
+    check("extract_elements gives the same result",
+          converter.extract_elements(row, prom_config) == elements)
+
+    elements = converter.extract_with_plan(
+        {"__LUT__Gender": "M", "Survey Date": "2024-01-01", "Score": 1,
+         "Side": "2", "Q1 Pain": 0}, plan)
+    check("one plan serves every row",
+          elements == {"GENDER": "0", "DATUMINVUL": "2024-01-01", "FUPK": "lo",
+                       "SIDEPK": "2", "OKS1PK": "0"}, elements)
+
+def test_lookup_plan():
+    """build_lookup_plan / merge_lut_with_plan."""
+    print("Testing build_lookup_plan / merge_lut_with_plan...")
+
+    plan = converter.build_lookup_plan(TEST_CONFIG["PROM"]["OKS"], "__LUT__")
+    check("add_columns mode", plan == converter.LookupPlan(
+        required=True, join_column="RecordNumber",
+        add_columns=[("Gender", "__LUT__Gender"),
+                     ("Date of Birth", "__LUT__Date of Birth"),
+                     ("Laterality", "__LUT__Laterality")]), plan)
+
+    legacy = converter.build_lookup_plan(
+        {"lookup": {"required": True, "join_column": "ID", "GENDER": "Sex"}}, "L_")
+    check("legacy element = column mapping",
+          legacy.add_columns == [("Sex", "L_Sex")], legacy.add_columns)
+    check("no lookup section means not required",
+          not converter.build_lookup_plan({}, "__LUT__").required)
+
+    lut_index = {"R1": {"Gender": "Male", "Date of Birth": "1950-01-01", "Other": 1}}
+    row = {"RecordNumber": " R1 ", "Q1 Pain": 3}
+    merged = converter.merge_lut_with_plan(row, lut_index, plan)
+    check("LUT columns merged with prefix", merged == {
+        "RecordNumber": " R1 ", "Q1 Pain": 3,
+        "__LUT__Gender": "Male", "__LUT__Date of Birth": "1950-01-01"}, merged)
+    check("row is copied unless inplace", "__LUT__Gender" not in row)
+    converter.merge_lut_with_plan(row, lut_index, plan, inplace=True)
+    check("inplace merges into the row itself", row.get("__LUT__Gender") == "Male")
+
+    missing = {"RecordNumber": "R2"}
+    check("unknown join value leaves the row as is",
+          converter.merge_lut_with_plan(missing, lut_index, plan) == {"RecordNumber": "R2"})
+    check("merge_lut_data gives the same result",
+          converter.merge_lut_data({"RecordNumber": "R1"}, lut_index,
+                                   TEST_CONFIG["PROM"]["OKS"], "__LUT__")
+          == converter.merge_lut_with_plan({"RecordNumber": "R1"}, lut_index, plan))
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Input Selection Tests
+# ──────────────────────────────────────────────────────────────────────────────
+
+def test_expand_xls_inputs(tmp_path: Path):
+    """main._expand_xls_inputs: folder crawl, filters and dedupe."""
+    print("Testing _expand_xls_inputs...")
+
+    root = tmp_path / "inputs"
+    (root / "sub" / "deeper").mkdir(parents=True)
+    for name in ["b.XLSX", "a.xls", "sub/c.Xlsx", "sub/deeper/d.xlsx",
+                 "~$a.xlsx", "sub/~$lock.XLS", "notes.txt", "sub/data.csv"]:
+        (root / name).write_bytes(b"")
+    explicit = root / "notes.txt"
+
+    err = io.StringIO()
+    with contextlib.redirect_stderr(err):
+        result = main._expand_xls_inputs(
+            [str(root), str(root / "b.XLSX"), str(root / "sub"), str(explicit),
+             str(tmp_path / "missing")])
+    expected = sorted(p.resolve() for p in [
+        root / "a.xls", root / "b.XLSX", root / "sub" / "c.Xlsx",
+        root / "sub" / "deeper" / "d.xlsx", explicit])
+    check("suffixes match in any case, lock files skipped, duplicates removed, sorted",
+          result == expected, result)
+    check("missing path is reported", "Path not found" in err.getvalue(), err.getvalue())
+
+    empty = tmp_path / "empty"
+    (empty / "sub").mkdir(parents=True)
+    (empty / "~$only.xlsx").write_bytes(b"")
+    err = io.StringIO()
+    with contextlib.redirect_stderr(err):
+        result = main._expand_xls_inputs([str(empty)])
+    check("folder without Excel files gives a warning", result == []
+          and "No .xlsx/.xls files found" in err.getvalue(), err.getvalue())
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Validation Tests
+# ──────────────────────────────────────────────────────────────────────────────
+
+XSD_PATH = Path(__file__).parent / "lroi" / "XSD_LROI_PROMs_v9_2-20210608.xsd"
+
+def test_validate_xml_batch(tmp_path: Path):
+    """validate_xml_batch returns the worst result over all files."""
+    print("Testing validate_xml_batch...")
+
+    fx = _make_fixtures(tmp_path)
+    valid = tmp_path / "valid.xml"
+    converter.convert(fx["inputs"], _config(), fx["lut"], valid)
+    invalid = tmp_path / "invalid.xml"
+    invalid.write_text(valid.read_text(encoding="utf-8").replace(
+        "<UPNNUM>", "<BOGUS>x</BOGUS><UPNNUM>", 1), encoding="utf-8")
+    malformed = tmp_path / "malformed.xml"
+    malformed.write_text("<questionaires><questionaire>", encoding="utf-8")
+
+    def run(*paths: Path) -> Any:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            code = validate_xml.validate_xml_batch([str(p) for p in paths], str(XSD_PATH))
+        return code, out.getvalue()
+
+    code, out = run(valid, valid)
+    check("converter output is XSD-valid", code == 0, out)
+    check("every file is reported", out.count("is VALID") == 2, out)
+    code, out = run(valid, invalid)
+    check("an invalid file gives 1", code == 1, out)
+    check("schema errors report line numbers", "Line " in out and "BOGUS" in out, out)
+    code, out = run(malformed, invalid)
+    check("a malformed file gives 2", code == 2, out)
+    code, out = run(tmp_path / "missing.xml", valid)
+    check("a missing file gives 2, the rest is still validated",
+          code == 2 and "is VALID" in out, out)
+    with contextlib.redirect_stdout(io.StringIO()):
+        code = validate_xml.validate_xml(str(invalid), str(XSD_PATH))
+    check("single-file validate_xml agrees", code == 1, code)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Logging Tests
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _read_xlsx_log(path: Path) -> List[List[Any]]:
+    """Return the Excel log rows (header included) as lists of values."""
+    ws = openpyxl.load_workbook(path).active
+    return [[c.value for c in row] for row in ws.iter_rows()]
+
+def _quiet_logger(**kwargs: Any) -> logging.Logger:
+    """setup_logger() for the "lroi" logger without the console handler."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        lg = logger.setup_logger(name="lroi", **kwargs)
+    for h in [h for h in lg.handlers if type(h) is logging.StreamHandler]:
+        lg.removeHandler(h)
+    return lg
+
+def test_xlsx_log(tmp_path: Path):
+    """The hand-written Excel log reads back correctly with openpyxl."""
+    print("Testing the Excel log file...")
+
+    xlsx = tmp_path / "log.xlsx"
+    with contextlib.redirect_stdout(io.StringIO()):
+        lg = logger.setup_logger(xlsx_file=xlsx, level=logging.DEBUG, name="lroi_test")
+        before = datetime.datetime.now().replace(microsecond=0)
+        lg.info("plain info admission_id=A17")
+        lg.warning("Admission ID: W9 <tag> & \"quoted\"")
+        lg.error("ctrl\x01\x1fchars\nsecond line")
+        logger.close_logger("lroi_test")
+
+    wb = openpyxl.load_workbook(xlsx)
+    ws = wb.active
+    rows = list(ws.iter_rows(min_row=1, max_row=ws.max_row))
+    values = [[c.value for c in row] for row in rows]
+
+    check("sheet is named Log", ws.title == "Log", ws.title)
+    check("header row", values[0] == ["Timestamp", "Level", "Admission ID", "Message"],
+          values[0])
+    check("header is bold on grey", all(
+        c.font.b and c.fill.fgColor.rgb == "00D3D3D3"
+        and c.alignment.horizontal == "center" for c in rows[0]))
+    check("frozen header row", ws.freeze_panes == "A2", ws.freeze_panes)
+    check("auto-filter covers all rows", ws.auto_filter.ref == f"A1:D{ws.max_row}",
+          ws.auto_filter.ref)
+    check("column widths", [ws.column_dimensions[c].width for c in "ABCD"]
+          == [20, 10, 15, 100])
+
+    body = {row[3]: (row, cells) for row, cells in zip(values[1:], rows[1:])}
+    info, info_cells = body["plain info admission_id=A17"]
+    check("INFO row values", info[1:3] == ["INFO", "A17"], info)
+    check("INFO row is unstyled", not info_cells[3].font.b
+          and info_cells[3].fill.fill_type is None)
+    check("timestamp is a date cell",
+          isinstance(info[0], datetime.datetime)
+          and before <= info[0] <= datetime.datetime.now()
+          and info_cells[0].number_format == "yyyy-mm-dd h:mm:ss", info[0])
+
+    warn, warn_cells = body['Admission ID: W9 <tag> & "quoted"']
+    check("WARNING row keeps &<> and quotes", warn[1:3] == ["WARNING", "W9"], warn)
+    check("WARNING row is orange", all(
+        c.font.color.rgb == "00FF8800" and c.fill.fgColor.rgb == "00FFF4E6"
+        for c in warn_cells))
+
+    error, error_cells = body["ctrlchars\nsecond line"]
+    check("ERROR row drops control characters, keeps newlines",
+          error[1:3] == ["ERROR", None], error)
+    check("ERROR row is bold red", all(
+        c.font.b and c.font.color.rgb == "00CC0000" and c.fill.fgColor.rgb == "00FFE6E6"
+        for c in error_cells))
+    check("ERROR timestamp is a date cell",
+          error_cells[0].number_format == "yyyy-mm-dd h:mm:ss")
+    check("temporary sheet file removed",
+          not (tmp_path / "log.xlsx.sheet1.xml").exists())
+
+def test_xlsx_log_write_failure(tmp_path: Path):
+    """A failed .xlsx write is reported and keeps the logged rows."""
+    print("Testing a failed Excel log write...")
+
+    xlsx = tmp_path / "locked.xlsx"
+    stderr = io.StringIO()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(stderr):
+        lg = logger.setup_logger(xlsx_file=xlsx, level=logging.INFO, name="lroi_locked")
+        lg.info("row that must survive")
+        xlsx.mkdir()  # the .xlsx cannot be created, like a file open in Excel
+        logger.close_logger("lroi_locked")
+
+    sheet = tmp_path / "locked.xlsx.sheet1.xml"
+    check("failure is reported on stderr",
+          f"Could not write Excel log {xlsx}" in stderr.getvalue()
+          and str(sheet) in stderr.getvalue(), stderr.getvalue())
+    check("temporary sheet is kept with the rows",
+          sheet.exists() and "row that must survive" in sheet.read_text(encoding="utf-8"))
+
+def test_xlsx_dedup_parallel(tmp_path: Path):
+    """Excel log throttling also applies to records from worker processes."""
+    print("Testing xlsx_log_max_repeats with parallel conversion...")
+
+    fx = _make_fixtures(tmp_path)
+    for workers in (1, 2):
+        xlsx = tmp_path / f"dedup_{workers}.xlsx"
+        _quiet_logger(xlsx_file=xlsx, level=logging.INFO, xlsx_max_repeats=3)
+        try:
+            converter.convert(fx["inputs"], _config(workers=workers), fx["lut"],
+                              tmp_path / f"dedup_{workers}.xml")
+        finally:
+            logger.close_logger("lroi")
+        messages = [row[3] for row in _read_xlsx_log(xlsx)[1:]]
+        converted = [m for m in messages if m.startswith("Converted OKS questionnaire")]
+        check(f"workers={workers}: at most 3 'Converted' rows in the Excel log",
+              len(converted) == 3, converted)
+        check(f"workers={workers}: summary row for the suppressed records",
+              "[12 similar records suppressed] Converted %s questionnaire: UPNNUM=%s"
+              in messages, messages[-3:])
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Run All Tests
+# ──────────────────────────────────────────────────────────────────────────────
+
+def run_all_tests() -> int:
+    """Run all test functions; returns the number of failed checks."""
+    # Keep converter warnings out of the test output
+    logging.getLogger("lroi").setLevel(logging.CRITICAL)
+
+    test_extraction_plan()
+    test_lookup_plan()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_parallel_matches_serial(Path(tmp))
+        test_expand_xls_inputs(Path(tmp))
+        test_validate_xml_batch(Path(tmp))
+        test_xlsx_log(Path(tmp))
+        test_xlsx_log_write_failure(Path(tmp))
+        test_xlsx_dedup_parallel(Path(tmp))
+
+    # Summary
+    total = len(all_test_results)
+    errors = sum(1 for r in all_test_results if not r["passed"])
+    passed = total - errors
+
+    print(f"\n{'='*60}")
+    print(f"SUMMARY: {passed}/{total} tests passed")
+    if errors > 0:
+        print(f"ERRORS: {errors} tests failed")
+        print("\nFailed tests:")
+        for r in all_test_results:
+            if not r["passed"]:
+                print(f"  ✗ {r['description']}")
+                if r["detail"] != "":
+                    print(f"    {r['detail']}")
+    else:
+        print("✓ All tests passed!")
+    print('='*60)
+    return errors
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Main
+# ──────────────────────────────────────────────────────────────────────────────
+
+if __name__ == '__main__':
+    sys.exit(1 if run_all_tests() else 0)
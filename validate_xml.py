@@ -3,51 +3,49 @@
 validate_xml.py — Validate LROI PROMs XML against XSD schema.
 
 Usage:
-    python validate_xml.py <xml_file> <xsd_file>
+    python validate_xml.py <xml_file> [<xml_file> ...] <xsd_file>
 
 Example:
     python validate_xml.py output.xml XSD_LROI_PROMs_v9_2-20210608.xsd
 """
 
+import functools
 import sys
 from pathlib import Path
+from typing import Iterable
 
 
-def validate_xml(xml_path: str, xsd_path: str) -> int:
-    """
-    Validate XML file against XSD schema.
-    
-    Returns:
-        0 if valid
-        1 if validation failed
-        2 if error (file not found, parse error, etc.)
-    """
-    try:
-        from lxml import etree
-    except ImportError:
-        print("Error: lxml not installed. Install with: pip install lxml")
-        return 2
-    
-    xml_file = Path(xml_path)
-    xsd_file = Path(xsd_path)
-    
-    # Check files exist
-    if not xml_file.exists():
+@functools.lru_cache(maxsize=8)
+def _load_schema(xsd_path: str):
+    """Parse and compile the XSD at *xsd_path* (cached, it is the slow part)."""
+    from lxml import etree
+    return etree.XMLSchema(etree.parse(xsd_path))
+
+
+def _validate_with_schema(xml_path: str, schema) -> int:
+    """Validate one XML file against a compiled schema and print the result."""
+    from lxml import etree
+
+    if not Path(xml_path).exists():
         print(f"Error: XML file not found: {xml_path}")
         return 2
-    
-    if not xsd_file.exists():
-        print(f"Error: XSD file not found: {xsd_path}")
-        return 2
-    
+
     try:
-        # Load schema
-        schema_doc = etree.parse(str(xsd_file))
-        schema = etree.XMLSchema(schema_doc)
-        
-        # Load and validate XML
-        xml_doc = etree.parse(str(xml_file))
-        
+        # Validate while parsing, without keeping the document in memory
+        try:
+            for _event, elem in etree.iterparse(
+                str(xml_path), events=("end",), schema=schema
+            ):
+                elem.clear()
+            print(f"✓ {xml_path} is VALID")
+            return 0
+        except etree.XMLSyntaxError:
+            pass
+
+        # Invalid or malformed: streaming validation reports no line numbers,
+        # so parse the full tree once more to report where the errors are
+        xml_doc = etree.parse(str(xml_path))
+
         if schema.validate(xml_doc):
             print(f"✓ {xml_path} is VALID")
             return 0
@@ -60,26 +58,77 @@ def validate_xml(xml_path: str, xsd_path: str) -> int:
             print()
             print(f"Total errors: {len(schema.error_log)}")
             return 1
-    
+
     except etree.XMLSyntaxError as e:
         print(f"✗ XML parsing error: {e}")
         return 2
-    
+
     except Exception as e:
         print(f"✗ Unexpected error: {e}")
         return 2
 
 
+def validate_xml_batch(xml_paths: Iterable[str], xsd_path: str) -> int:
+    """
+    Validate several XML files against one XSD schema, compiled only once.
+
+    Returns:
+        the worst result over all files (0 valid, 1 invalid, 2 error)
+    """
+    try:
+        from lxml import etree
+    except ImportError:
+        print("Error: lxml not installed. Install with: pip install lxml")
+        return 2
+
+    xsd_file = Path(xsd_path)
+
+    if not xsd_file.exists():
+        print(f"Error: XSD file not found: {xsd_path}")
+        return 2
+
+    try:
+        # Load schema
+        schema = _load_schema(str(xsd_file.resolve()))
+    except etree.XMLSyntaxError as e:
+        print(f"✗ XML parsing error: {e}")
+        return 2
+    except Exception as e:
+        print(f"✗ Unexpected error: {e}")
+        return 2
+
+    result = 0
+    for xml_path in xml_paths:
+        result = max(result, _validate_with_schema(xml_path, schema))
+    return result
+
+
+def validate_xml(xml_path: str, xsd_path: str) -> int:
+    """
+    Validate XML file against XSD schema.
+
+    Returns:
+        0 if valid
+        1 if validation failed
+        2 if error (file not found, parse error, etc.)
+    """
+    if not Path(xml_path).exists():
+        print(f"Error: XML file not found: {xml_path}")
+        return 2
+
+    return validate_xml_batch([xml_path], xsd_path)
+
+
 def main():
-    if len(sys.argv) != 3:
+    if len(sys.argv) < 3:
         print(__doc__)
-        print("Error: Requires exactly 2 arguments")
+        print("Error: Requires at least 2 arguments")
         return 2
-    
-    xml_file = sys.argv[1]
-    xsd_file = sys.argv[2]
-    
-    return validate_xml(xml_file, xsd_file)
+
+    xml_files = sys.argv[1:-1]
+    xsd_file = sys.argv[-1]
+
+    return validate_xml_batch(xml_files, xsd_file)
 
 
 if __name__ == "__main__":